@@ -0,0 +1,204 @@
+"""
+Multi-defect compositing engine for the synthetic data generator.
+Places K non-overlapping defect cutouts on a printer-bed background and
+alpha-blends them with vectorized NumPy into buffers that are allocated once
+and reused for every image, so the per-image cost is just the cutout resize
+and a few in-place array operations.
+"""
+
+import os
+
+import numpy as np
+from PIL import Image
+
+
+class Compositor:
+    """
+    Reusable canvas for building synthetic images.
+
+    Usage:
+        comp = Compositor(backgrounds, cutouts, canvas_size=(640, 640))
+        rgb, labels = comp.compose(np.random.default_rng(0), k=3)
+
+    The returned image is a view into an internal buffer — it is overwritten
+    by the next compose() call, so save or copy it first.
+    """
+
+    def __init__(
+        self,
+        backgrounds,
+        cutouts,
+        canvas_size=(640, 640),
+        scale_range=(0.3, 0.9),
+        multi_scale_range=(0.1, 0.4),
+        max_attempts=20,
+    ):
+        """
+        Args:
+            backgrounds: list of PIL Images or uint8 arrays (RGB/RGBA). Each is
+                    resized to canvas_size once here, not per image.
+            cutouts: dict mapping class_id -> list of RGBA PIL Images
+                    (background already removed).
+            canvas_size: (width, height) of the generated images.
+            scale_range: Longest cutout side as a fraction of the canvas width
+                    when a single defect is placed.
+            multi_scale_range: Same, used when K > 1 so several defects fit.
+            max_attempts: Random placements tried per defect before giving up
+                    on it because it would overlap an already placed one.
+        """
+        self.width, self.height = canvas_size
+        self.scale_range = scale_range
+        self.multi_scale_range = multi_scale_range
+        self.max_attempts = max_attempts
+
+        self.backgrounds = [self._prepare_background(bg) for bg in backgrounds]
+        self.cutouts = {cid: imgs for cid, imgs in cutouts.items() if imgs}
+        self.class_ids = sorted(self.cutouts)
+
+        if not self.backgrounds:
+            raise ValueError("Compositor needs at least one background image.")
+        if not self.class_ids:
+            raise ValueError("Compositor needs at least one defect cutout.")
+
+        # Preallocated working buffers, reused for every image.
+        h, w = self.height, self.width
+        self._canvas = np.empty((h, w, 3), dtype=np.float32)
+        self._scratch = np.empty((h, w, 3), dtype=np.float32)
+        self._alpha = np.empty((h, w, 1), dtype=np.float32)
+        self._out = np.empty((h, w, 3), dtype=np.uint8)
+
+    def _prepare_background(self, bg):
+        if not isinstance(bg, Image.Image):
+            bg = Image.fromarray(np.asarray(bg))
+        bg = bg.convert("RGB")
+        if bg.size != (self.width, self.height):
+            bg = bg.resize((self.width, self.height), Image.LANCZOS)
+        return np.asarray(bg, dtype=np.uint8)
+
+    def _place(self, rng, defect, scale_range, placed):
+        """
+        Picks a size and position for one cutout that does not overlap any
+        box in `placed` (float array of [x1, y1, x2, y2] rows).
+        Returns: (x, y, w, h) in pixels, or None if no free spot was found.
+        """
+        max_dim = max(defect.width, defect.height)
+
+        for _ in range(self.max_attempts):
+            scale = rng.uniform(*scale_range)
+            factor = (self.width * scale) / max_dim
+
+            # Clamp so the defect never exceeds the canvas
+            new_w = max(1, min(int(defect.width * factor), self.width - 2))
+            new_h = max(1, min(int(defect.height * factor), self.height - 2))
+
+            max_x = self.width - new_w
+            max_y = self.height - new_h
+            if max_x <= 0 or max_y <= 0:
+                # Fallback to center if the defect is near full canvas size
+                x, y = max_x // 2, max_y // 2
+            else:
+                x = int(rng.integers(0, max_x + 1))
+                y = int(rng.integers(0, max_y + 1))
+
+            if len(placed) == 0:
+                return x, y, new_w, new_h
+
+            # Vectorized overlap test against every box placed so far.
+            p = np.asarray(placed)
+            overlaps = (
+                (x < p[:, 2]) & (x + new_w > p[:, 0]) &
+                (y < p[:, 3]) & (y + new_h > p[:, 1])
+            )
+            if not overlaps.any():
+                return x, y, new_w, new_h
+
+        return None
+
+    def _blend(self, rgba, x, y):
+        """Alpha-blends an (h, w, 4) uint8 cutout into the canvas in place."""
+        h, w = rgba.shape[:2]
+        region = self._canvas[y:y + h, x:x + w]
+        alpha = self._alpha[:h, :w]
+        diff = self._scratch[:h, :w]
+
+        # region += alpha * (cutout - region), all on preallocated buffers
+        np.multiply(rgba[..., 3:4], 1.0 / 255.0, out=alpha, casting="unsafe")
+        np.subtract(rgba[..., :3], region, out=diff, casting="unsafe")
+        np.multiply(diff, alpha, out=diff)
+        np.add(region, diff, out=region)
+
+    def compose(self, rng, k=1):
+        """
+        Builds one synthetic image with up to k non-overlapping defects.
+
+        Args:
+            rng: numpy.random.Generator — the only source of randomness, so a
+                 seeded generator reproduces the same image.
+            k: Number of defects to place. k=1 matches the original
+               single-defect generator (30–90% scale, anywhere on the bed).
+
+        Returns:
+            (image, labels)
+            - image (numpy.ndarray): (H, W, 3) uint8 RGB, a reused buffer.
+            - labels (list[tuple]): One (class_id, x_center, y_center, w, h)
+              per placed defect, normalized to 0–1 in YOLO order.
+        """
+        bg = self.backgrounds[rng.integers(len(self.backgrounds))]
+        np.copyto(self._canvas, bg, casting="unsafe")
+
+        scale_range = self.scale_range if k == 1 else self.multi_scale_range
+        placed = []
+        labels = []
+
+        for _ in range(k):
+            class_id = self.class_ids[rng.integers(len(self.class_ids))]
+            variants = self.cutouts[class_id]
+            defect = variants[rng.integers(len(variants))]
+
+            spot = self._place(rng, defect, scale_range, placed)
+            if spot is None:
+                continue
+            x, y, w, h = spot
+
+            resized = np.asarray(defect.resize((w, h), Image.LANCZOS), dtype=np.uint8)
+            self._blend(resized, x, y)
+
+            placed.append((x, y, x + w, y + h))
+            labels.append((
+                class_id,
+                (x + w / 2) / self.width,
+                (y + h / 2) / self.height,
+                w / self.width,
+                h / self.height,
+            ))
+
+        # Round back to uint8 into the reusable output buffer.
+        np.add(self._canvas, 0.5, out=self._scratch)
+        np.copyto(self._out, self._scratch, casting="unsafe")
+        return self._out, labels
+
+
+def load_cutouts(cache_dir, class_map):
+    """
+    Reads the RGBA cutouts cached on disk by syntetic_generated_data.py
+    (one sub-folder of .png files per defect name).
+
+    Args:
+        cache_dir: Root of the cutout cache.
+        class_map: dict mapping defect folder name -> class_id.
+
+    Returns: dict mapping class_id -> list of RGBA PIL Images.
+    """
+    cutouts = {}
+    for name, class_id in class_map.items():
+        folder = os.path.join(cache_dir, name)
+        if not os.path.isdir(folder):
+            continue
+        images = []
+        for fname in sorted(os.listdir(folder)):
+            if not fname.lower().endswith(".png"):
+                continue
+            with Image.open(os.path.join(folder, fname)) as img:
+                images.append(img.convert("RGBA"))
+        cutouts[class_id] = images
+    return cutouts
@@ -1,27 +1,187 @@
+"""
+Crops printer-bed backgrounds out of raw photos for the synthetic generator.
+
+Interactive (default): draw the bed region for every photo, one at a time;
+crops keep their drawn size.
+Presets: fixed-mount cameras see the same bed region in every shot, so a
+region can be drawn once and saved as a named preset (per camera), and
+optionally linked to an input folder. With a preset, every photo is cropped,
+resized to TARGET_SIZE and written unattended on a process pool, and photos
+that already have an up-to-date output are skipped. The ROI and size each
+output was cropped with are recorded in the output folder, so redefining a
+preset (or editing roi_presets.json) re-crops everything it affects.
+
+Usage:
+    python data/scripts/crop_background.py                      # draw a box per photo
+    python data/scripts/crop_background.py --define cam1        # draw once, save preset, batch-crop
+    python data/scripts/crop_background.py --preset cam1        # headless batch with a saved preset
+    python data/scripts/crop_background.py --input data/cam1    # uses the preset linked to that folder
+"""
+
 import cv2
 import os
 import glob
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
 # --- CONFIGURATION ---
 INPUT_FOLDER = "data\printer_bed"   # Put your original phone photos here
 OUTPUT_FOLDER = "data/clean_printerbed"      # Where the clean, cropped JPGs go
-TARGET_SIZE = (640, 640)                # Optional: Resize to YOLO standard
+TARGET_SIZE = (640, 640)                # Batch/preset mode resizes to this (None keeps the crop size)
+PRESETS_FILE = "data/roi_presets.json"  # Saved bed regions per camera / folder
+CROP_STATE_FILE = ".crop_state.json"    # Inside the output folder: output name -> crop settings
+DISPLAY_MAX = (1280, 800)               # Largest window used for drawing the box
+JPEG_QUALITY = 95
+NUM_WORKERS = os.cpu_count() or 1
 
-def crop_images():
-    # Create folders
-    if not os.path.exists(INPUT_FOLDER):
-        os.makedirs(INPUT_FOLDER)
-        print(f"Created folder '{INPUT_FOLDER}'. Please put your raw photos there and run again!")
-        return
 
-    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+def parse_args():
+    parser = argparse.ArgumentParser(description="Crop printer-bed backgrounds")
+    parser.add_argument("--input", default=INPUT_FOLDER, help="Folder with raw photos.")
+    parser.add_argument("--output", default=OUTPUT_FOLDER, help="Folder for cropped JPGs.")
+    parser.add_argument("--preset", help="Batch-crop with this saved ROI preset.")
+    parser.add_argument("--define", metavar="NAME",
+                        help="Draw the ROI once, save it as preset NAME for this folder, then re-crop "
+                             "the whole folder with it.")
+    parser.add_argument("--force", action="store_true", help="Re-crop images that already have an output.")
+    return parser.parse_args()
 
-    # Get all images
+
+def load_presets():
+    if not os.path.exists(PRESETS_FILE):
+        return {"presets": {}, "folders": {}}
+    with open(PRESETS_FILE, "r") as f:
+        return json.load(f)
+
+
+def save_presets(presets):
+    os.makedirs(os.path.dirname(PRESETS_FILE) or ".", exist_ok=True)
+    with open(PRESETS_FILE, "w") as f:
+        json.dump(presets, f, indent=2)
+
+
+def folder_key(folder):
+    return os.path.normpath(folder).replace("\\", "/")
+
+
+def list_images(folder):
     extensions = ['*.jpg', '*.jpeg', '*.png', '*.HEIC']
     files = []
     for ext in extensions:
-        files.extend(glob.glob(os.path.join(INPUT_FOLDER, ext)))
+        files.extend(glob.glob(os.path.join(folder, ext)))
+    return sorted(files)
+
+
+def output_path(filepath, output_folder):
+    save_name = os.path.splitext(os.path.basename(filepath))[0] + ".jpg"
+    return os.path.join(output_folder, save_name)
+
+
+def select_roi(img):
+    """
+    Lets the user draw the bed region on a screen-sized preview.
+    Returns: (x, y, w, h) as fractions of the full image, or None if cancelled.
+    """
+    # Scale the preview to fit the screen; the crop itself uses full resolution.
+    scale_percent = min(1.0, DISPLAY_MAX[0] / img.shape[1], DISPLAY_MAX[1] / img.shape[0])
+    width = int(img.shape[1] * scale_percent)
+    height = int(img.shape[0] * scale_percent)
+    display_img = cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA)
+
+    # OPEN SELECTOR WINDOW
+    # Draw the box, then hit SPACE or ENTER
+    x, y, w, h = cv2.selectROI("Select Bed Area (Press Enter)", display_img, showCrosshair=True, fromCenter=False)
+    cv2.destroyAllWindows()
+
+    # Check if user cancelled (all zeros)
+    if w == 0 or h == 0:
+        return None
+    return (x / width, y / height, w / width, h / height)
+
+
+def crop_and_save(img, roi, save_path, target_size=None):
+    """
+    Crops a fractional (x, y, w, h) ROI at full resolution and writes a JPG,
+    resized to target_size if given.
+    """
+    img_h, img_w = img.shape[:2]
+    real_x = int(roi[0] * img_w)
+    real_y = int(roi[1] * img_h)
+    real_w = int(roi[2] * img_w)
+    real_h = int(roi[3] * img_h)
+
+    cropped_img = img[real_y:real_y+real_h, real_x:real_x+real_w]
+    if target_size:
+        cropped_img = cv2.resize(cropped_img, target_size, interpolation=cv2.INTER_AREA)
+
+    cv2.imwrite(save_path, cropped_img, [int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY])
+
+
+def _crop_job(job):
+    """Worker: (filepath, roi, save_path) -> True if written."""
+    filepath, roi, save_path = job
+    img = cv2.imread(filepath)
+    if img is None:
+        return False
+    crop_and_save(img, roi, save_path, TARGET_SIZE)
+    return True
+
+
+def load_crop_state(output_folder):
+    path = os.path.join(output_folder, CROP_STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
 
+
+def save_crop_state(output_folder, state):
+    with open(os.path.join(output_folder, CROP_STATE_FILE), "w") as f:
+        json.dump(state, f, indent=0, sort_keys=True)
+
+
+def crop_settings(roi):
+    """What an output depends on besides its source image."""
+    return {"roi": [round(v, 6) for v in roi], "size": list(TARGET_SIZE) if TARGET_SIZE else None}
+
+
+def is_up_to_date(filepath, save_path, recorded, settings):
+    """Output exists, is newer than the source and was cropped with the same ROI and size."""
+    return (
+        recorded == settings
+        and os.path.exists(save_path)
+        and os.path.getmtime(save_path) >= os.path.getmtime(filepath)
+    )
+
+
+def crop_batch(files, roi, output_folder, force=False):
+    state = load_crop_state(output_folder)
+    settings = crop_settings(roi)
+    jobs = []
+    for f in files:
+        save_path = output_path(f, output_folder)
+        if force or not is_up_to_date(f, save_path, state.get(os.path.basename(save_path)), settings):
+            jobs.append((f, roi, save_path))
+
+    print(f"Batch cropping {len(jobs)} new or changed images ({len(files) - len(jobs)} already done) "
+          f"on {NUM_WORKERS} workers...")
+    if not jobs:
+        return
+
+    with ProcessPoolExecutor(max_workers=NUM_WORKERS) as pool:
+        results = list(pool.map(_crop_job, jobs, chunksize=8))
+
+    for (_, _, save_path), ok in zip(jobs, results):
+        if ok:
+            state[os.path.basename(save_path)] = settings
+    save_crop_state(output_folder, state)
+
+    done = sum(results)
+    print(f"Saved {done} crops to {output_folder} ({len(jobs) - done} unreadable).")
+
+
+def crop_interactive(files, output_folder):
     print(f"Found {len(files)} images. Instructions:")
     print("1. Draw a box around the printer bed using your mouse.")
     print("2. Press ENTER or SPACE to confirm the crop.")
@@ -34,53 +194,74 @@ def crop_images():
 
         # Load image
         img = cv2.imread(filepath)
-        
+
         if img is None:
             print(f"Error reading {filename}. Skipping.")
             continue
 
-        # Resize huge images (like 4000px from phone) so they fit on screen
-        # This is just for display; we will crop the original resolution if needed
-        # But for simplicity, let's just work with a resized view
-        scale_percent = 0.3 # Adjust if images are too big/small on your screen
-        width = int(img.shape[1] * scale_percent)
-        height = int(img.shape[0] * scale_percent)
-        dim = (width, height)
-        
-        display_img = cv2.resize(img, dim, interpolation=cv2.INTER_AREA)
-
-        # OPEN SELECTOR WINDOW
-        # Draw the box, then hit SPACE or ENTER
-        roi = cv2.selectROI("Select Bed Area (Press Enter)", display_img, showCrosshair=True, fromCenter=False)
-        
-        # roi is (x, y, w, h)
-        x, y, w, h = roi
-        
-        # Check if user cancelled (all zeros)
-        if w == 0 or h == 0:
+        roi = select_roi(img)
+        if roi is None:
             print("Skipped.")
-            cv2.destroyAllWindows()
             continue
 
-        # Map the crop back to the ORIGINAL image size
-        real_x = int(x / scale_percent)
-        real_y = int(y / scale_percent)
-        real_w = int(w / scale_percent)
-        real_h = int(h / scale_percent)
+        save_path = output_path(filepath, output_folder)
+        crop_and_save(img, roi, save_path)
+        print(f"Saved: {save_path}")
 
-        cropped_img = img[real_y:real_y+real_h, real_x:real_x+real_w]
 
-        # Save as JPG
-        save_name = os.path.splitext(filename)[0] + ".jpg"
-        save_path = os.path.join(OUTPUT_FOLDER, save_name)
-        
-        cv2.imwrite(save_path, cropped_img, [int(cv2.IMWRITE_JPEG_QUALITY), 95])
-        print(f"Saved: {save_path}")
+def crop_images():
+    args = parse_args()
+
+    # Create folders
+    if not os.path.exists(args.input):
+        os.makedirs(args.input)
+        print(f"Created folder '{args.input}'. Please put your raw photos there and run again!")
+        return
+
+    os.makedirs(args.output, exist_ok=True)
+
+    # Get all images
+    files = list_images(args.input)
+    if not files:
+        print(f"No images found in {args.input}.")
+        return
+
+    presets = load_presets()
+
+    if args.define:
+        img = None
+        for filepath in files:
+            img = cv2.imread(filepath)
+            if img is not None:
+                break
+        if img is None:
+            print("None of the images could be read.")
+            return
+        print(f"Draw the bed region for preset '{args.define}' (used for every image).")
+        roi = select_roi(img)
+        if roi is None:
+            print("Cancelled. Preset not saved.")
+            return
+        presets["presets"][args.define] = list(roi)
+        presets["folders"][folder_key(args.input)] = args.define
+        save_presets(presets)
+        print(f"Saved preset '{args.define}' to {PRESETS_FILE}")
+        preset_name = args.define
+    else:
+        preset_name = args.preset or presets["folders"].get(folder_key(args.input))
 
-        # Close window to clean up
-        cv2.destroyAllWindows()
+    if preset_name is None:
+        crop_interactive(files, args.output)
+    else:
+        if preset_name not in presets["presets"]:
+            print(f"Unknown preset '{preset_name}'. Define it first with --define {preset_name}.")
+            return
+        print(f"Using ROI preset '{preset_name}'.")
+        # A freshly drawn ROI replaces every crop in the folder.
+        crop_batch(files, presets["presets"][preset_name], args.output,
+                   force=args.force or bool(args.define))
 
     print("All done! Your backgrounds are ready.")
 
 if __name__ == "__main__":
-    crop_images()
\ No newline at end of file
+    crop_images()
@@ -1,20 +1,29 @@
 import os
-import random
 import numpy as np
 import torchvision.transforms.functional as TF
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image, ImageEnhance
 from rembg import remove, new_session
 from tqdm import tqdm
 
+from compositor import Compositor
+
 # --- CONFIGURATION ---
 BACKGROUNDS_DIR = "data\clean_printerbed"
 RAW_DATA_ROOT = r"data/3D-Printing-Defect-Dataset/data"
 OUTPUT_IMG_DIR = "data/processed/images/train"
 OUTPUT_LBL_DIR = "data/processed/labels/train"
+CUTOUT_CACHE_DIR = "data/cutout_cache"   # rembg output, reused across runs and by synthetic_stream.py
 # How many images to generate total?
 TOTAL_IMAGES = 1000
 TARGET_SIZE = (640, 640)
 
+# Reproducibility: every image gets its own RNG seeded from (SEED, index),
+# so the output is identical no matter how many workers run it.
+SEED = 42
+NUM_WORKERS = os.cpu_count() or 1   # Set to 1 to generate in a single process
+CHUNKSIZE = 16                      # Images handed to a worker per task batch
+
 # Exact folder names -> Class IDs
 CLASS_MAP = {
     "Spaghetti": 0,
@@ -24,12 +33,26 @@ CLASS_MAP = {
     "Offplatfrom": 4,
     "Cracking": 5
 }
+CLASS_NAMES = {class_id: name for name, class_id in CLASS_MAP.items()}
+
+# Defects per image: K is drawn uniformly from this (min, max) range.
+# (1, 1) reproduces the original one-defect-per-image dataset; e.g. (1, 4)
+# adds crowded beds with several smaller defects, which the model misses most.
+DEFECTS_PER_IMAGE = (1, 1)
+SCALE_RANGE = (0.3, 0.9)        # Longest defect side vs. bed width when K == 1
+MULTI_SCALE_RANGE = (0.1, 0.4)  # Same, when several defects share the bed
+
+# Per-process state, filled once by _init_worker() so backgrounds are
+# decoded and resized once per worker and the blend buffers are reused.
+_WORKER = {}
 
 def build_defect_cache(session):
     """
     Pre-removes backgrounds from every defect image once at startup.
     Cached results are reused in the generation loop, so rembg is not
     called 1000 times — only once per unique source image.
+    Cutouts are also written to CUTOUT_CACHE_DIR as RGBA .png, so later runs
+    (and the on-the-fly training stream) skip rembg entirely.
     Returns: dict mapping defect_name -> list of PIL Images (RGBA, bg removed)
     """
     cache = {name: [] for name in CLASS_MAP}
@@ -41,15 +64,26 @@ def build_defect_cache(session):
             print(f"  WARNING: folder not found: {folder}")
             continue
 
-        files = [f for f in os.listdir(folder) if f.lower().endswith(('.jpg', '.png'))]
+        cache_folder = os.path.join(CUTOUT_CACHE_DIR, defect_name)
+        os.makedirs(cache_folder, exist_ok=True)
+
+        # Sorted so cutout indices (and therefore the seeded output) are stable
+        files = sorted(f for f in os.listdir(folder) if f.lower().endswith(('.jpg', '.png')))
         print(f"  {defect_name}: {len(files)} images")
         total_files += len(files)
 
         for fname in tqdm(files, desc=f"  Removing bg — {defect_name}", leave=False):
             try:
+                cached_path = os.path.join(cache_folder, os.path.splitext(fname)[0] + ".png")
+                if os.path.exists(cached_path):
+                    with Image.open(cached_path) as cached:
+                        cache[defect_name].append(cached.convert("RGBA"))
+                    continue
+
                 path = os.path.join(folder, fname)
                 img = Image.open(path).convert("RGBA")
                 img_nobg = remove(img, session=session)
+                img_nobg.save(cached_path)
                 cache[defect_name].append(img_nobg)
             except Exception:
                 continue
@@ -58,6 +92,54 @@ def build_defect_cache(session):
     return cache
 
 
+def _init_worker(background_paths, defect_cache):
+    """Runs once in every pool process: pre-resize backgrounds into a Compositor."""
+    backgrounds = [Image.open(p) for p in background_paths]
+    cutouts = {CLASS_MAP[name]: imgs for name, imgs in defect_cache.items()}
+    _WORKER["compositor"] = Compositor(
+        backgrounds, cutouts,
+        canvas_size=TARGET_SIZE,
+        scale_range=SCALE_RANGE,
+        multi_scale_range=MULTI_SCALE_RANGE,
+    )
+
+
+def _generate_one(i):
+    """
+    Builds and writes synthetic image number i.
+    All randomness comes from an RNG seeded with (SEED, i), so the result does
+    not depend on which worker picks the image up or in what order.
+    Returns: True if the image and label were written.
+    """
+    try:
+        rng = np.random.default_rng([SEED, i])
+
+        # 4. Composite K defects onto a random (pre-resized) background.
+        # K=1 keeps the original single-defect behaviour.
+        k = int(rng.integers(DEFECTS_PER_IMAGE[0], DEFECTS_PER_IMAGE[1] + 1))
+        image, labels = _WORKER["compositor"].compose(rng, k=k)
+        if not labels:
+            return False
+
+        # 5. Save Image
+        if len(labels) == 1:
+            filename = f"synth_{CLASS_NAMES[labels[0][0]]}_{i}.jpg"
+        else:
+            filename = f"synth_multi_{i}.jpg"
+        Image.fromarray(image).save(f"{OUTPUT_IMG_DIR}/{filename}")
+
+        # 6. Save Label — one line per placed defect
+        label_filename = os.path.splitext(filename)[0] + ".txt"
+        with open(f"{OUTPUT_LBL_DIR}/{label_filename}", "w") as f:
+            for class_id, x_center, y_center, w_norm, h_norm in labels:
+                f.write(f"{class_id} {x_center:.6f} {y_center:.6f} {w_norm:.6f} {h_norm:.6f}\n")
+
+        return True
+
+    except Exception:
+        return False
+
+
 def generate_centered_dataset():
     os.makedirs(OUTPUT_IMG_DIR, exist_ok=True)
     os.makedirs(OUTPUT_LBL_DIR, exist_ok=True)
@@ -89,72 +171,23 @@ def generate_centered_dataset():
         print("ERROR: No defect images were cached. Check RAW_DATA_ROOT path.")
         return
 
-    print("Generating Dataset with Randomized Placement...")
-
-    for i in tqdm(range(TOTAL_IMAGES)):
-        try:
-            # 4. Pick Random Background & Resize
-            bg_path = random.choice(background_paths)
-            bg = Image.open(bg_path).convert("RGBA")
-            bg = bg.resize(TARGET_SIZE, Image.LANCZOS)
-            bg_w, bg_h = bg.size
-
-            # 5. Pick Random Defect from cache (instant — no rembg call here)
-            defect_name = random.choice(valid_classes)
-            class_id = CLASS_MAP[defect_name]
-            defect = random.choice(defect_cache[defect_name]).copy()
-
-            # 6. Smart Resize — randomized scale 30–90% of bed (was 50–80%)
-            # Wider range teaches the model to detect defects at various distances/sizes.
-            scale = random.uniform(0.3, 0.9)
-
-            max_defect_dim = max(defect.width, defect.height)
-            scaling_factor = (bg_w * scale) / max_defect_dim
-
-            new_w = int(defect.width * scaling_factor)
-            new_h = int(defect.height * scaling_factor)
-
-            # Clamp so defect never exceeds the canvas
-            new_w = min(new_w, bg_w - 2)
-            new_h = min(new_h, bg_h - 2)
-
-            defect = defect.resize((new_w, new_h), Image.LANCZOS)
-
-            # 7. RANDOMIZED POSITION — defects occur anywhere on the bed in reality.
-            # Keep defect fully inside the canvas by limiting placement range.
-            max_x = bg_w - new_w
-            max_y = bg_h - new_h
-
-            if max_x <= 0 or max_y <= 0:
-                # Fallback to center if defect is near full canvas size
-                x_pos = (bg_w - new_w) // 2
-                y_pos = (bg_h - new_h) // 2
-            else:
-                x_pos = random.randint(0, max_x)
-                y_pos = random.randint(0, max_y)
-
-            # 8. Paste
-            final_img = bg.copy()
-            final_img.paste(defect, (x_pos, y_pos), defect)
-
-            # 9. Save Image
-            filename = f"synth_{defect_name}_{i}.jpg"
-            final_img.convert("RGB").save(f"{OUTPUT_IMG_DIR}/{filename}")
-
-            # 10. Save Label — compute actual bounding box from paste position
-            x_center = (x_pos + new_w / 2) / bg_w
-            y_center = (y_pos + new_h / 2) / bg_h
-            w_norm = new_w / bg_w
-            h_norm = new_h / bg_h
-
-            label_filename = os.path.splitext(filename)[0] + ".txt"
-            with open(f"{OUTPUT_LBL_DIR}/{label_filename}", "w") as f:
-                f.write(f"{class_id} {x_center:.6f} {y_center:.6f} {w_norm:.6f} {h_norm:.6f}\n")
+    print(f"Generating Dataset with Randomized Placement ({NUM_WORKERS} workers, seed {SEED})...")
 
-        except Exception as e:
-            continue
+    # Sorted so background indices (and therefore the output) are stable
+    # across runs and operating systems.
+    background_paths.sort()
+
+    written = 0
+    with ProcessPoolExecutor(
+        max_workers=NUM_WORKERS,
+        initializer=_init_worker,
+        initargs=(background_paths, defect_cache),
+    ) as pool:
+        results = pool.map(_generate_one, range(TOTAL_IMAGES), chunksize=CHUNKSIZE)
+        for ok in tqdm(results, total=TOTAL_IMAGES):
+            written += ok
 
-    print(f"Done! Generated {TOTAL_IMAGES} images in {OUTPUT_IMG_DIR}")
+    print(f"Done! Generated {written} / {TOTAL_IMAGES} images in {OUTPUT_IMG_DIR}")
 
 if __name__ == "__main__":
     generate_centered_dataset()
@@ -0,0 +1,164 @@
+"""
+On-the-fly synthetic training data.
+CURRENT ROLE: Instead of training on the fixed 1000-image collage written by
+syntetic_generated_data.py, every training sample is composited in memory
+inside the dataloader workers from the cached rembg cutouts and the clean
+printer-bed backgrounds. Each epoch sees brand new images, with no disk I/O
+and no storage that grows with the dataset size.
+FUTURE ROLE: Mix the stream with real captures from the large-scale printer
+once those exist (validation already runs on the real val split).
+
+Usage:
+    python train.py --stream
+
+Run syntetic_generated_data.py once first so CUTOUT_CACHE_DIR is populated.
+"""
+
+import os
+import random
+
+import numpy as np
+from PIL import Image
+from ultralytics.data import YOLODataset
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.utils import colorstr
+from ultralytics.utils.torch_utils import de_parallel
+
+from compositor import Compositor, load_cutouts
+
+# --- CONFIGURATION ---
+BACKGROUNDS_DIR = "data/clean_printerbed"
+CUTOUT_CACHE_DIR = "data/cutout_cache"   # Written by syntetic_generated_data.py
+SAMPLES_PER_EPOCH = 1000                 # Virtual epoch length (samples are never reused)
+DEFECTS_PER_IMAGE = (1, 3)               # K drawn uniformly from (min, max) per sample
+SCALE_RANGE = (0.3, 0.9)
+MULTI_SCALE_RANGE = (0.1, 0.4)
+
+
+class SyntheticStreamDataset(YOLODataset):
+    """
+    YOLODataset whose samples are generated on demand instead of read from disk.
+
+    The normal ultralytics augmentation pipeline (mosaic, mixup, HSV, flips)
+    still runs on top of every generated image. The Compositor is built lazily
+    so that each dataloader worker loads the cutouts once and keeps its own
+    preallocated blend buffers.
+    """
+
+    def __init__(self, *args, samples_per_epoch=SAMPLES_PER_EPOCH, **kwargs):
+        self.samples_per_epoch = samples_per_epoch
+        self._compositor = None
+        self._rng = None
+        super().__init__(*args, **kwargs)
+
+    def __getstate__(self):
+        # Workers rebuild the compositor themselves; never pickle its buffers.
+        state = self.__dict__.copy()
+        state["_compositor"] = None
+        state["_rng"] = None
+        return state
+
+    def get_img_files(self, img_path):
+        """Virtual file names — only used for logging and batch metadata."""
+        return [f"synthetic_stream_{i}.jpg" for i in range(self.samples_per_epoch)]
+
+    def get_labels(self):
+        """Placeholder labels; the real ones are created with each sample."""
+        return [
+            {
+                "im_file": im_file,
+                "shape": (self.imgsz, self.imgsz),
+                "cls": np.zeros((0, 1), dtype=np.float32),
+                "bboxes": np.zeros((0, 4), dtype=np.float32),
+                "segments": [],
+                "keypoints": None,
+                "normalized": True,
+                "bbox_format": "xywh",
+            }
+            for im_file in self.im_files
+        ]
+
+    def _build_compositor(self):
+        backgrounds = [
+            os.path.join(BACKGROUNDS_DIR, f)
+            for f in sorted(os.listdir(BACKGROUNDS_DIR))
+            if f.lower().endswith(('.jpg', '.jpeg', '.png'))
+        ]
+        class_map = {name: class_id for class_id, name in self.data["names"].items()}
+        cutouts = load_cutouts(CUTOUT_CACHE_DIR, class_map)
+        if not any(cutouts.values()):
+            raise FileNotFoundError(
+                f"No cached cutouts in {CUTOUT_CACHE_DIR}.\n"
+                "Run python data/scripts/syntetic_generated_data.py once first."
+            )
+        return Compositor(
+            [Image.open(p) for p in backgrounds], cutouts,
+            canvas_size=(self.imgsz, self.imgsz),
+            scale_range=SCALE_RANGE,
+            multi_scale_range=MULTI_SCALE_RANGE,
+        )
+
+    def get_image_and_label(self, index):
+        if self._compositor is None:
+            self._compositor = self._build_compositor()
+            # ultralytics seeds `random` per dataloader worker, so this gives
+            # every worker its own (reproducible) stream of samples.
+            self._rng = np.random.default_rng(random.getrandbits(64))
+
+        k = int(self._rng.integers(DEFECTS_PER_IMAGE[0], DEFECTS_PER_IMAGE[1] + 1))
+        rgb, objects = self._compositor.compose(self._rng, k=k)
+
+        img = np.ascontiguousarray(rgb[..., ::-1])  # RGB -> BGR copy, rgb is a reused buffer
+        shape = img.shape[:2]
+
+        label = {
+            "im_file": self.im_files[index],
+            "cls": np.array([[o[0]] for o in objects], dtype=np.float32).reshape(-1, 1),
+            "bboxes": np.array([o[1:] for o in objects], dtype=np.float32).reshape(-1, 4),
+            "segments": [],
+            "keypoints": None,
+            "normalized": True,
+            "bbox_format": "xywh",
+            "img": img,
+            "ori_shape": shape,
+            "resized_shape": shape,
+            "ratio_pad": (1.0, 1.0),
+        }
+
+        # Mosaic/mixup draw their extra samples from this buffer.
+        if self.augment:
+            self.buffer.append(index)
+            if len(self.buffer) > self.max_buffer_length:
+                self.buffer.pop(0)
+
+        return self.update_labels_info(label)
+
+
+class SyntheticStreamTrainer(DetectionTrainer):
+    """DetectionTrainer that streams synthetic training data; val stays on disk."""
+
+    def build_dataset(self, img_path, mode="train", batch=None):
+        if mode != "train":
+            return super().build_dataset(img_path, mode, batch)
+
+        gs = max(int(de_parallel(self.model).stride.max() if self.model else 0), 32)
+        return SyntheticStreamDataset(
+            img_path=img_path,
+            imgsz=self.args.imgsz,
+            batch_size=batch,
+            augment=True,
+            hyp=self.args,
+            rect=False,
+            cache=None,
+            single_cls=self.args.single_cls or False,
+            stride=gs,
+            pad=0.0,
+            prefix=colorstr("train (stream): "),
+            task=self.args.task,
+            classes=self.args.classes,
+            data=self.data,
+        )
+
+    def plot_training_labels(self):
+        # Labels only exist once samples are drawn; nothing to plot up front.
+        pass
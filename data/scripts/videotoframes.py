@@ -2,4 +2,146 @@
 Data extraction tool for the 'No-Hardware' phase.
 CURRENT ROLE: Extracts frames from downloaded YouTube/Open Source failure videos to build the initial training dataset.
 FUTURE ROLE: Can be used later to extract frames from your own recordings of large-scale print failures to further fine-tune the model.
-"""
\ No newline at end of file
+
+How it stays fast on multi-hour recordings:
+- Each video is handled by its own worker process.
+- Frames are sampled every FRAME_STRIDE_SEC of video time by seeking straight
+  to the next timestamp (CAP_PROP_POS_MSEC), so skipped frames are never
+  decoded. Only strides up to GRAB_MAX_STRIDE_SEC (off by default) step
+  through with grab() instead, which decodes every frame but avoids the
+  keyframe decode a seek costs — worth it only for very short strides.
+- Near-static frames (print barely changed since the last kept frame) are
+  dropped with a cheap mean-absolute-difference on a tiny grayscale thumbnail.
+- JPEG encoding and writing runs on a small thread pool, so decoding never
+  waits for the disk.
+
+Usage:
+    python data/scripts/videotoframes.py
+"""
+
+import os
+import glob
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+# --- CONFIGURATION ---
+INPUT_FOLDER = "data/videos"                # Downloaded / recorded videos
+OUTPUT_FOLDER = "data/video_frames"         # Extracted JPGs go here
+FRAME_STRIDE_SEC = 2.0                      # Sample one frame every N seconds of video
+GRAB_MAX_STRIDE_SEC = 0.0                   # Strides up to this long use grab() instead of seeking (0 = always seek)
+CHANGE_THRESHOLD = 6.0                      # Mean abs. pixel change (0-255) needed to keep a frame
+THUMB_SIZE = (64, 36)                       # Thumbnail used for the change metric
+JPEG_QUALITY = 95
+NUM_WORKERS = os.cpu_count() or 1           # Videos decoded in parallel
+ENCODE_THREADS = 2                          # JPEG writer threads per worker
+MAX_PENDING_WRITES = 16                     # Back-pressure for the writer threads
+
+VIDEO_EXTENSIONS = ['*.mp4', '*.avi', '*.mov', '*.mkv', '*.webm']
+
+
+def _thumbnail(frame):
+    small = cv2.resize(frame, THUMB_SIZE, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+
+def _write_jpeg(path, frame):
+    cv2.imwrite(path, frame, [int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY])
+
+
+def extract_video(video_path):
+    """
+    Extracts the non-redundant frames of one video (runs in a worker process).
+    Returns: (video name, frames sampled, frames written, video seconds)
+    """
+    name = os.path.splitext(os.path.basename(video_path))[0]
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"Error opening {video_path}. Skipping.")
+        return name, 0, 0, 0.0
+
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    stride = max(1, int(round(fps * FRAME_STRIDE_SEC)))
+    use_grab = FRAME_STRIDE_SEC <= GRAB_MAX_STRIDE_SEC
+
+    sampled = written = 0
+    frame_idx = 0
+    last_thumb = None
+    pending = []
+
+    with ThreadPoolExecutor(max_workers=ENCODE_THREADS) as writer:
+        while True:
+            if use_grab:
+                ms = int(frame_idx * 1000 / fps)
+            else:
+                ms = int(sampled * FRAME_STRIDE_SEC * 1000)
+                cap.set(cv2.CAP_PROP_POS_MSEC, ms)
+            ok, frame = cap.read()
+            if not ok:
+                break
+            sampled += 1
+
+            thumb = _thumbnail(frame)
+            if last_thumb is None or np.abs(thumb - last_thumb).mean() >= CHANGE_THRESHOLD:
+                last_thumb = thumb
+                out_path = os.path.join(OUTPUT_FOLDER, f"{name}_{ms:09d}.jpg")
+                pending.append(writer.submit(_write_jpeg, out_path, frame))
+                written += 1
+
+                # Bound memory: wait for the oldest write if the writers fall behind.
+                if len(pending) >= MAX_PENDING_WRITES:
+                    pending.pop(0).result()
+
+            if use_grab:
+                # Step to the next sample without converting frames to BGR.
+                for _ in range(stride - 1):
+                    if not cap.grab():
+                        break
+                frame_idx += stride
+
+        for future in pending:
+            future.result()
+
+    cap.release()
+    return name, sampled, written, sampled * FRAME_STRIDE_SEC
+
+
+def extract_frames():
+    if not os.path.exists(INPUT_FOLDER):
+        os.makedirs(INPUT_FOLDER)
+        print(f"Created folder '{INPUT_FOLDER}'. Please put your videos there and run again!")
+        return
+
+    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+
+    videos = []
+    for ext in VIDEO_EXTENSIONS:
+        videos.extend(glob.glob(os.path.join(INPUT_FOLDER, ext)))
+    videos.sort()
+
+    if not videos:
+        print(f"No videos found in {INPUT_FOLDER}.")
+        return
+
+    print(f"Found {len(videos)} videos. Sampling every {FRAME_STRIDE_SEC}s "
+          f"on {min(NUM_WORKERS, len(videos))} workers...")
+
+    start = time.time()
+    total_written = 0
+    total_seconds = 0.0
+
+    with ProcessPoolExecutor(max_workers=min(NUM_WORKERS, len(videos))) as pool:
+        for name, sampled, written, seconds in pool.map(extract_video, videos):
+            print(f"  {name}: kept {written} / {sampled} sampled frames ({seconds / 60:.1f} min of video)")
+            total_written += written
+            total_seconds += seconds
+
+    elapsed = time.time() - start
+    speed = total_seconds / elapsed if elapsed > 0 else 0.0
+    print(f"Done! {total_written} frames in {OUTPUT_FOLDER} "
+          f"({total_seconds / 60:.1f} min of video in {elapsed:.1f}s, {speed:.0f}x real-time)")
+
+if __name__ == "__main__":
+    extract_frames()
@@ -1,33 +1,85 @@
+"""
+Validates the YOLO dataset in data/processed and writes data/processed/manifest.json.
+Every image/label pair is checked in one pass (see src/dataset_index.py);
+re-runs only re-read files that changed since the last check.
+
+Usage:
+    python directory_check.py            # check and report
+    python directory_check.py --fix      # also rename name.jpg.txt -> name.txt
+"""
+
+import argparse
 import os
-import glob
+import time
+
+from src.dataset_index import DOUBLE_EXTENSION, build_manifest, fix_double_extensions
 
 # CONFIG (Match your defect_data.yaml)
-BASE_DIR = "data/processed" 
-IMG_DIR = os.path.join(BASE_DIR, "images/train")
-LBL_DIR = os.path.join(BASE_DIR, "labels/train")
+BASE_DIR = "data/processed"
+CLASS_NAMES = ["Spaghetti", "Warping", "Layer_shifting", "Stringing", "Offplatfrom", "Cracking"]
+MAX_LISTED = 10     # Example files printed per problem type
 
-def check_structure():
-    print(f"Checking: {os.path.abspath(IMG_DIR)}")
-    images = glob.glob(os.path.join(IMG_DIR, "*.jpg"))
-    print(f"Found {len(images)} images.")
-
-    print(f"Checking: {os.path.abspath(LBL_DIR)}")
-    labels = glob.glob(os.path.join(LBL_DIR, "*.txt"))
-    print(f"Found {len(labels)} label files.")
-
-    if len(images) > 0 and len(labels) == 0:
-        print("\nCRITICAL ERROR: Images found but NO labels found.")
-        print("YOLO requires a folder named 'labels' next to 'images'.")
-    elif len(images) == 0:
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Dataset structure and label check")
+    parser.add_argument("--root", default=BASE_DIR, help="Dataset root (images/, labels/).")
+    parser.add_argument(
+        "--fix", action="store_true",
+        help="Rename double-extension labels (name.jpg.txt -> name.txt)."
+    )
+    return parser.parse_args()
+
+
+def report(manifest):
+    summary = manifest["summary"]
+
+    if not summary["splits"]:
         print("\nCRITICAL ERROR: No images found. Check your path.")
-    else:
-        # Check a pair
-        test_img = os.path.basename(images[0])
-        test_lbl = test_img.replace(".jpg", ".txt")
-        if os.path.exists(os.path.join(LBL_DIR, test_lbl)):
-            print(f"\nSUCCESS: Matched {test_img} with {test_lbl}")
+        return
+
+    for split, stats in sorted(summary["splits"].items()):
+        print(f"\n  {split}: {stats['images']} images, {stats['objects']} objects, "
+              f"{stats['negatives']} negatives (empty label)")
+        for class_id, count in sorted(stats["classes"].items(), key=lambda kv: int(kv[0])):
+            cid = int(class_id)
+            name = CLASS_NAMES[cid] if cid < len(CLASS_NAMES) else f"<unknown {cid}>"
+            print(f"    {name:<15} {count}")
+
+    if not summary["problems"]:
+        print("\nSUCCESS: Every image has a valid label file.")
+        return
+
+    print("\nProblems found:")
+    for problem, count in sorted(summary["problems"].items()):
+        print(f"  {problem:<17} {count}")
+        if problem == "orphan_label":
+            examples = manifest["orphan_labels"][:MAX_LISTED]
         else:
-            print(f"\nERROR: Could not find label for {test_img}")
+            examples = [rel for rel, e in manifest["entries"].items() if problem in e["problems"]]
+            examples = examples[:MAX_LISTED]
+        for rel in examples:
+            print(f"      {rel}")
+
+    if DOUBLE_EXTENSION in summary["problems"]:
+        print("\nRun with --fix to rename double-extension labels.")
+
+
+def check_structure():
+    args = parse_args()
+    print(f"Checking: {os.path.abspath(args.root)}")
+
+    start = time.time()
+    manifest = build_manifest(args.root)
+
+    if args.fix and DOUBLE_EXTENSION in manifest["summary"]["problems"]:
+        renamed = fix_double_extensions(args.root, manifest)
+        print(f"Renamed {renamed} double-extension label files.")
+        manifest = build_manifest(args.root)
+
+    print(f"Indexed {len(manifest['images'])} images and {len(manifest['labels'])} label files "
+          f"({manifest['reindexed']} re-read) in {time.time() - start:.2f}s")
+    report(manifest)
+
 
 if __name__ == "__main__":
-    check_structure()
\ No newline at end of file
+    check_structure()
@@ -0,0 +1,336 @@
+"""
+Scores detector backends against YOLO label files on CPU.
+
+Unlike test_model.py (which renders annotated media), this only measures:
+- mAP@50 and mAP@50-95 (COCO-style 101-point AP per class),
+- per-class precision / recall at the deployed confidence threshold,
+- per-image inference latency percentiles and peak worker memory.
+
+Images are spread across worker processes; each worker loads the backend once.
+Box matching and AP are computed with vectorized NumPy IoU in the main process.
+
+Backends:
+    --model path/to/best.pt          ultralytics weights (.pt, .onnx, OpenVINO dir, ...)
+    --model package.module:factory   any callable factory(imgsz) returning
+                                     predict(frame) -> (xyxy, conf, cls) arrays
+
+Usage:
+    python evaluate.py --model runs/.../best.pt
+    python evaluate.py --model a.pt --model b.onnx --workers 4 --json report.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from src.utils import IMAGE_EXTENSIONS, box_iou, read_yolo_label, xywhn_to_xyxy
+
+# --- CONFIGURATION ---
+DEFAULT_IMAGES = "data/processed/val.txt"   # Folder of images or an image list (.txt)
+CONF_THRESHOLD = 0.55       # Deployed threshold (main.py) for precision/recall
+EVAL_CONF = 0.001           # Keep low-confidence boxes for the AP curve
+IOU_NMS = 0.50
+IMGSZ = 640
+NUM_WORKERS = max(1, (os.cpu_count() or 1) // 2)
+THREADS_PER_WORKER = 2      # Torch/ONNX threads per worker process
+CLASS_NAMES = ["Spaghetti", "Warping", "Layer_shifting", "Stringing", "Offplatfrom", "Cracking"]
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Detector evaluation harness")
+    parser.add_argument("--model", action="append", required=True,
+                        help="Weights path or module:factory. Repeat to compare variants.")
+    parser.add_argument("--images", default=DEFAULT_IMAGES, help="Image folder or list file.")
+    parser.add_argument("--conf", type=float, default=CONF_THRESHOLD)
+    parser.add_argument("--imgsz", type=int, default=IMGSZ)
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS)
+    parser.add_argument("--json", help="Also write the full report to this file.")
+    return parser.parse_args()
+
+
+# ----------------------------------------------------------------------
+# Dataset
+# ----------------------------------------------------------------------
+
+def list_images(source):
+    """Images from a folder or an ultralytics-style list file ('./images/...')."""
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, f) for f in os.listdir(source)
+            if f.lower().endswith(IMAGE_EXTENSIONS)
+        )
+    parent = os.path.dirname(os.path.abspath(source))
+    with open(source, "r") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    return [os.path.join(parent, line[2:]) if line.startswith("./") else line for line in lines]
+
+
+def label_path(image_path):
+    """Same convention as ultralytics: .../images/... -> .../labels/....txt"""
+    sep = os.sep
+    path = image_path.replace("/", sep)
+    path = f"{sep}labels{sep}".join(path.rsplit(f"{sep}images{sep}", 1))
+    return os.path.splitext(path)[0] + ".txt"
+
+
+# ----------------------------------------------------------------------
+# Backends (run inside worker processes)
+# ----------------------------------------------------------------------
+
+class UltralyticsBackend:
+    """Any format ultralytics can load (.pt, .onnx, openvino, ...)."""
+
+    def __init__(self, weights, imgsz):
+        from ultralytics import YOLO
+
+        self.model = YOLO(weights, task="detect")
+        self.imgsz = imgsz
+
+    def __call__(self, frame):
+        r = self.model.predict(
+            source=frame, conf=EVAL_CONF, iou=IOU_NMS, imgsz=self.imgsz,
+            agnostic_nms=True, verbose=False,
+        )[0]
+        boxes = r.boxes
+        return (
+            boxes.xyxy.cpu().numpy(),
+            boxes.conf.cpu().numpy(),
+            boxes.cls.cpu().numpy().astype(np.int64),
+        )
+
+
+def load_backend(spec, imgsz):
+    if ":" in spec and not os.path.exists(spec):
+        module_name, factory = spec.split(":", 1)
+        return getattr(importlib.import_module(module_name), factory)(imgsz)
+    return UltralyticsBackend(spec, imgsz)
+
+
+_WORKER = {}
+
+
+def _init_worker(spec, imgsz):
+    try:
+        import torch
+        torch.set_num_threads(THREADS_PER_WORKER)
+    except ImportError:
+        pass
+    _WORKER["backend"] = load_backend(spec, imgsz)
+
+    # Warm-up so the first timed image does not include lazy initialisation.
+    _WORKER["backend"](np.zeros((imgsz, imgsz, 3), dtype=np.uint8))
+
+
+def _peak_rss_mb():
+    """Peak resident memory of this process in MB (NaN if it cannot be read)."""
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # KB on Linux
+    except ImportError:
+        pass
+    try:
+        import psutil   # Windows
+        return psutil.Process().memory_info().peak_wset / 1024 ** 2
+    except (ImportError, AttributeError):
+        return float("nan")
+
+
+def _predict_one(path):
+    """
+    Returns (path, image (h, w), xyxy, conf, cls, latency_ms, peak_rss_mb),
+    or None if the image is unreadable.
+    """
+    frame = cv2.imread(path)
+    if frame is None:
+        return None
+    start = time.perf_counter()
+    xyxy, conf, cls = _WORKER["backend"](frame)
+    latency_ms = (time.perf_counter() - start) * 1000
+    return path, frame.shape[:2], xyxy, conf, cls, latency_ms, _peak_rss_mb()
+
+
+# ----------------------------------------------------------------------
+# Metrics
+# ----------------------------------------------------------------------
+
+def match_predictions(pred_xyxy, pred_conf, pred_cls, gt_xyxy, gt_cls):
+    """
+    Marks each prediction as TP/FP at every IoU threshold (0.50:0.95).
+    COCO greedy matching, same class only: predictions are walked in
+    descending confidence, and each takes the highest-IoU ground truth not
+    yet matched at that threshold. Backends may return predictions in any
+    order.
+    Returns: bool array (n_pred, len(IOU_THRESHOLDS)), in the input order.
+    """
+    tp = np.zeros((len(pred_xyxy), len(IOU_THRESHOLDS)), dtype=bool)
+    if len(pred_xyxy) == 0 or len(gt_xyxy) == 0:
+        return tp
+
+    order = np.argsort(-pred_conf, kind="stable")
+    iou = box_iou(pred_xyxy[order], gt_xyxy) * (pred_cls[order][:, None] == gt_cls[None, :])
+    # Only predictions that clear the lowest threshold can match at all.
+    candidates = np.flatnonzero(iou.max(axis=1) >= IOU_THRESHOLDS[0])
+    for t, threshold in enumerate(IOU_THRESHOLDS):
+        free = np.ones(len(gt_xyxy), dtype=bool)
+        for k in candidates:
+            row = np.where(free, iou[k], 0.0)
+            g = row.argmax()
+            if row[g] >= threshold:
+                free[g] = False
+                tp[order[k], t] = True
+    return tp
+
+
+def average_precision(recall, precision):
+    """
+    COCO 101-point interpolated AP for one precision/recall curve (points in
+    descending-confidence order): the mean, over recall thresholds
+    0, 0.01, ..., 1, of the best precision reached at that recall or higher.
+    """
+    envelope = np.maximum.accumulate(precision[::-1])[::-1]
+    idx = np.searchsorted(recall, np.linspace(0, 1, 101), side="left")
+    reached = idx < len(recall)
+    return float(np.where(reached, envelope[np.minimum(idx, len(recall) - 1)], 0.0).mean())
+
+
+def compute_metrics(tp, conf, pred_cls, gt_cls, conf_threshold, n_classes):
+    """
+    Args:
+        tp: (n_pred, n_iou) bool, conf / pred_cls: (n_pred,), gt_cls: (n_gt,)
+    Returns: dict with per-class AP50, AP50-95, precision and recall at
+        conf_threshold (IoU 0.5), plus the means over classes that have labels.
+    """
+    order = np.argsort(-conf, kind="stable")
+    tp, conf, pred_cls = tp[order], conf[order], pred_cls[order]
+
+    per_class = {}
+    for c in range(n_classes):
+        n_gt = int((gt_cls == c).sum())
+        mask = pred_cls == c
+        if n_gt == 0 and not mask.any():
+            continue
+
+        ap = np.zeros(tp.shape[1])
+        if n_gt and mask.any():
+            tpc = tp[mask].cumsum(axis=0)
+            fpc = (~tp[mask]).cumsum(axis=0)
+            recall = tpc / n_gt
+            precision = tpc / (tpc + fpc)
+            ap = np.array([average_precision(recall[:, j], precision[:, j]) for j in range(tp.shape[1])])
+
+        deployed = mask & (conf >= conf_threshold)
+        hits = int(tp[deployed, 0].sum())
+        n_pred = int(deployed.sum())
+        per_class[c] = {
+            "instances": n_gt,
+            "precision": hits / n_pred if n_pred else 0.0,
+            "recall": hits / n_gt if n_gt else 0.0,
+            "ap50": float(ap[0]),
+            "ap50_95": float(ap.mean()),
+        }
+
+    labelled = [m for m in per_class.values() if m["instances"]]
+    mean = lambda key: float(np.mean([m[key] for m in labelled])) if labelled else 0.0
+    return {
+        "map50": mean("ap50"),
+        "map50_95": mean("ap50_95"),
+        "precision": mean("precision"),
+        "recall": mean("recall"),
+        "per_class": per_class,
+    }
+
+
+def evaluate(spec, images, conf_threshold=CONF_THRESHOLD, imgsz=IMGSZ, workers=NUM_WORKERS):
+    """
+    Runs one backend over all images and scores it.
+    Returns: metrics dict (see compute_metrics) plus 'latency_ms' percentiles,
+        'peak_rss_mb' of the largest worker and 'images_per_sec' throughput.
+    """
+    all_tp, all_conf, all_cls, all_gt, latencies = [], [], [], [], []
+    peak_rss_mb = 0.0
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(spec, imgsz)
+    ) as pool:
+        for result in pool.map(_predict_one, images, chunksize=8):
+            if result is None:
+                continue
+            path, (h, w), xyxy, conf, cls, latency_ms, rss_mb = result
+            peak_rss_mb = max(peak_rss_mb, rss_mb)
+
+            gt_cls, gt_boxes = np.zeros(0, dtype=np.int64), np.zeros((0, 4), dtype=np.float32)
+            lbl = label_path(path)
+            if os.path.exists(lbl):
+                gt_cls, gt_boxes = read_yolo_label(lbl)
+
+            all_tp.append(match_predictions(xyxy, conf, cls, xywhn_to_xyxy(gt_boxes, w, h), gt_cls))
+            all_conf.append(conf)
+            all_cls.append(cls)
+            all_gt.append(gt_cls)
+            latencies.append(latency_ms)
+    wall = time.perf_counter() - start
+
+    if not latencies:
+        raise RuntimeError("No readable images to evaluate.")
+
+    metrics = compute_metrics(
+        np.concatenate(all_tp), np.concatenate(all_conf), np.concatenate(all_cls),
+        np.concatenate(all_gt), conf_threshold, len(CLASS_NAMES),
+    )
+    lat = np.array(latencies)
+    metrics["latency_ms"] = {
+        "mean": float(lat.mean()),
+        "p50": float(np.percentile(lat, 50)),
+        "p90": float(np.percentile(lat, 90)),
+        "p99": float(np.percentile(lat, 99)),
+    }
+    metrics["peak_rss_mb"] = peak_rss_mb
+    metrics["images"] = len(latencies)
+    metrics["images_per_sec"] = len(latencies) / wall
+    return metrics
+
+
+def print_report(spec, m, conf_threshold):
+    print("-" * 72)
+    print(f"{spec}")
+    print(f"  images: {m['images']}   mAP@50: {m['map50']:.4f}   mAP@50-95: {m['map50_95']:.4f}")
+    print(f"  latency ms  mean {m['latency_ms']['mean']:.1f}  p50 {m['latency_ms']['p50']:.1f}  "
+          f"p90 {m['latency_ms']['p90']:.1f}  p99 {m['latency_ms']['p99']:.1f}   "
+          f"({m['images_per_sec']:.1f} img/s total, {m['peak_rss_mb']:.0f} MB peak)")
+    print(f"  {'class':<15} {'inst':>6} {'P@' + str(conf_threshold):>8} {'R@' + str(conf_threshold):>8} "
+          f"{'AP50':>7} {'AP50-95':>8}")
+    for c, pc in sorted(m["per_class"].items()):
+        name = CLASS_NAMES[c] if c < len(CLASS_NAMES) else str(c)
+        print(f"  {name:<15} {pc['instances']:>6} {pc['precision']:>8.3f} {pc['recall']:>8.3f} "
+              f"{pc['ap50']:>7.3f} {pc['ap50_95']:>8.3f}")
+
+
+def main():
+    args = parse_args()
+    images = list_images(args.images)
+    if not images:
+        print(f"No images found in {args.images}.")
+        return
+    print(f"Evaluating {len(args.model)} model(s) on {len(images)} images with {args.workers} workers.")
+
+    report = {}
+    for spec in args.model:
+        report[spec] = evaluate(spec, images, args.conf, args.imgsz, args.workers)
+        print_report(spec, report[spec], args.conf)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Post-training stage: exports deployable model variants, benchmarks them and
+picks the one to deploy.
+
+For every input size in IMGSZ_VARIANTS it produces:
+    - .pt           FP32 (the trained weights, run at that input size)
+    - .onnx         FP32
+    - .onnx         INT8 (dynamic weight quantization with onnxruntime, if installed)
+
+Each variant is scored on the val split with evaluate.py (mAP, CPU latency
+percentiles, peak memory). The fastest variant (p50 latency) whose mAP@50
+reaches MAP_FLOOR is written as 'recommended' to variants/manifest.json,
+which Detector (and main.py --model) can load directly.
+
+Usage:
+    python export_variants.py --weights runs/detect/3d_print_monitor/<run>/weights/best.pt
+    python train.py --variants        # runs this stage after training
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+
+import evaluate
+
+# --- CONFIGURATION ---
+IMGSZ_VARIANTS = (320, 416, 640)    # Input sizes to export
+MAP_FLOOR = 0.80                    # Minimum val mAP@50 a variant must keep
+VAL_IMAGES = evaluate.DEFAULT_IMAGES
+MANIFEST_NAME = "manifest.json"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export and select deployable model variants")
+    parser.add_argument("--weights", required=True, help="Trained best.pt")
+    parser.add_argument("--images", default=VAL_IMAGES, help="Val image folder or list file.")
+    parser.add_argument("--map-floor", type=float, default=MAP_FLOOR)
+    parser.add_argument("--workers", type=int, default=evaluate.NUM_WORKERS)
+    return parser.parse_args()
+
+
+def export_variants(weights, out_dir):
+    """
+    Writes every variant into out_dir.
+    Returns: list of dicts (name, path, format, precision, imgsz).
+    """
+    from ultralytics import YOLO
+
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(weights))[0]
+
+    pt_path = os.path.join(out_dir, f"{stem}.pt")
+    shutil.copy2(weights, pt_path)
+
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError:
+        quantize_dynamic = None
+        print("[Variants] onnxruntime not installed — skipping INT8 variants.")
+
+    variants = []
+    for imgsz in IMGSZ_VARIANTS:
+        variants.append({
+            "name": f"{stem}_{imgsz}_fp32.pt", "path": pt_path,
+            "format": "pt", "precision": "fp32", "imgsz": imgsz,
+        })
+
+        print(f"[Variants] Exporting ONNX @ {imgsz} ...")
+        # Export from the copy in out_dir: ultralytics writes the .onnx next to
+        # its weights, so weights/best.onnx from train.py is left alone.
+        exported = YOLO(pt_path).export(format="onnx", imgsz=imgsz, simplify=True, verbose=False)
+        onnx_path = os.path.join(out_dir, f"{stem}_{imgsz}_fp32.onnx")
+        shutil.move(exported, onnx_path)
+        variants.append({
+            "name": os.path.basename(onnx_path), "path": onnx_path,
+            "format": "onnx", "precision": "fp32", "imgsz": imgsz,
+        })
+
+        if quantize_dynamic is not None:
+            int8_path = os.path.join(out_dir, f"{stem}_{imgsz}_int8.onnx")
+            quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QUInt8)
+            variants.append({
+                "name": os.path.basename(int8_path), "path": int8_path,
+                "format": "onnx", "precision": "int8", "imgsz": imgsz,
+            })
+
+    return variants
+
+
+def select_variant(variants, map_floor):
+    """
+    Fastest variant (p50 latency) with map50 >= map_floor.
+    Falls back to the most accurate variant if none reaches the floor.
+    Returns: (variant, met_floor)
+    """
+    eligible = [v for v in variants if v["map50"] >= map_floor]
+    if eligible:
+        return min(eligible, key=lambda v: v["latency_ms_p50"]), True
+    return max(variants, key=lambda v: v["map50"]), False
+
+
+def run_stage(weights, images=VAL_IMAGES, map_floor=MAP_FLOOR, workers=evaluate.NUM_WORKERS):
+    """Export, benchmark and write the manifest. Returns the manifest path."""
+    out_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(weights))), "variants")
+    variants = export_variants(weights, out_dir)
+
+    val_images = evaluate.list_images(images)
+    print(f"[Variants] Benchmarking {len(variants)} variants on {len(val_images)} val images ...")
+
+    for v in variants:
+        m = evaluate.evaluate(v["path"], val_images, imgsz=v["imgsz"], workers=workers)
+        v.update({
+            "map50": m["map50"],
+            "map50_95": m["map50_95"],
+            "latency_ms_p50": m["latency_ms"]["p50"],
+            "latency_ms_p90": m["latency_ms"]["p90"],
+            "peak_rss_mb": m["peak_rss_mb"],
+            "size_mb": os.path.getsize(v["path"]) / 1024 ** 2,
+        })
+        print(f"  {v['name']:<28} mAP@50 {v['map50']:.4f}  p50 {v['latency_ms_p50']:6.1f} ms  "
+              f"{v['peak_rss_mb']:5.0f} MB")
+        # Paths in the manifest are relative so the folder can be copied to the Pi.
+        v["path"] = os.path.relpath(v["path"], out_dir)
+
+    best, met_floor = select_variant(variants, map_floor)
+    if not met_floor:
+        print(f"[Variants] WARNING: no variant reaches mAP@50 {map_floor}; recommending the most accurate.")
+
+    manifest = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "source_weights": os.path.abspath(weights),
+        "map_floor": map_floor,
+        "met_floor": met_floor,
+        "recommended": best["name"],
+        "variants": variants,
+    }
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"[Variants] Recommended: {best['name']} (imgsz {best['imgsz']}, "
+          f"mAP@50 {best['map50']:.4f}, p50 {best['latency_ms_p50']:.1f} ms)")
+    print(f"[Variants] Manifest: {manifest_path}")
+    return manifest_path
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    run_stage(args.weights, args.images, args.map_floor, args.workers)
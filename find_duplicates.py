@@ -0,0 +1,274 @@
+"""
+Finds near-duplicate images in data/processed and reports train/val leaks.
+
+The synthetic generator reuses a few backgrounds and cutouts, and scraped
+negatives often contain re-uploads of the same photo. Near-duplicates that
+end up on both sides of the split make the val mAP look better than it is.
+
+How it works:
+    1. Every image gets a 64-bit difference hash (dHash), computed in parallel
+       worker processes and cached by content SHA-1 (from the manifest built
+       by src/dataset_index.py), so only new or changed images are hashed.
+    2. Near-duplicates (Hamming distance <= MAX_DISTANCE) are found with a
+       multi-index search: the hash is cut into MAX_DISTANCE + 1 bands, and by
+       the pigeonhole principle any close pair matches exactly on at least one
+       band. Only images sharing a band are compared (vectorized popcount,
+       in fixed-size tiles), instead of comparing every pair. Identical
+       hashes are collapsed to one representative before the search.
+    3. Matches are merged into clusters; clusters spanning train and val are
+       reported as leaks. Split membership comes from splits.json (written by
+       split_dataset.py) when it exists, otherwise from the images/<split> folder.
+
+Usage:
+    python find_duplicates.py                 # report only
+    python find_duplicates.py --prune         # resolve train/val leaks
+"""
+
+import argparse
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from split_dataset import write_lists
+from src.dataset_index import ASSIGN_FILE, build_manifest
+
+# --- CONFIGURATION ---
+BASE_DIR = "data/processed"
+CACHE_FILE = "phash_cache.npz"          # Inside BASE_DIR, keyed by image SHA-1
+REPORT_FILE = "duplicates.json"         # Inside BASE_DIR
+QUARANTINE_DIR = "data/duplicates"      # Where --prune moves leaked val images
+MAX_DISTANCE = 5                        # Hamming distance (of 64 bits) counted as duplicate
+BLOCK = 1024                            # Tile size for comparing large band buckets
+NUM_WORKERS = os.cpu_count() or 1
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Near-duplicate finder")
+    parser.add_argument("--root", default=BASE_DIR, help="Dataset root (images/, labels/).")
+    parser.add_argument("--distance", type=int, default=MAX_DISTANCE,
+                        help="Max Hamming distance between duplicate hashes (0-63).")
+    parser.add_argument("--prune", action="store_true",
+                        help="Move the val members of train/val leak clusters into train "
+                             f"(with splits.json) or to {QUARANTINE_DIR} (folder splits).")
+    return parser.parse_args()
+
+
+def dhash(path):
+    """
+    64-bit difference hash: compares horizontally adjacent pixels of a 9x8
+    grayscale thumbnail. Robust to re-encoding, resizing and small edits.
+    Returns: int hash, or None if the image cannot be read.
+    """
+    # Reduced-size decode is much faster for JPEGs and plenty for a 9x8 thumbnail.
+    img = cv2.imread(path, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if img is None:
+        return None
+    small = cv2.resize(img, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def popcount64(x):
+    """Vectorized number of set bits in a uint64 array."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x)
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+    return table[x.view(np.uint8).reshape(-1, 8)].sum(axis=1)
+
+
+def load_hashes(root, manifest):
+    """
+    Returns (paths, hashes) for every readable image, hashing only images
+    whose SHA-1 is not in the cache yet.
+    """
+    cache_path = os.path.join(root, CACHE_FILE)
+    cache = {}
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as data:
+            cache = dict(zip(data["sha1"].tolist(), data["hash"].tolist()))
+
+    images = manifest["images"]
+    paths = sorted(images)
+    todo = sorted({images[p]["sha1"]: p for p in paths if images[p]["sha1"] not in cache}.items())
+
+    if todo:
+        print(f"Hashing {len(todo)} new images on {NUM_WORKERS} workers...")
+        with ProcessPoolExecutor(max_workers=NUM_WORKERS) as pool:
+            files = [os.path.join(root, p) for _, p in todo]
+            for (sha1, _), h in zip(todo, pool.map(dhash, files, chunksize=64)):
+                if h is not None:
+                    cache[sha1] = h
+
+        np.savez(
+            cache_path,
+            sha1=np.array(list(cache.keys()), dtype=str),
+            hash=np.array(list(cache.values()), dtype=np.uint64),
+        )
+
+    paths = [p for p in paths if images[p]["sha1"] in cache]
+    hashes = np.array([cache[images[p]["sha1"]] for p in paths], dtype=np.uint64)
+    return paths, hashes
+
+
+def _exact_pairs(hashes):
+    """
+    Collapses identical hashes before the band search.
+    Returns: (representative index per unique hash, int array (m, 2) linking
+    every other copy to its representative).
+    """
+    _, first, inverse = np.unique(hashes, return_index=True, return_inverse=True)
+    rep = first[inverse.ravel()]
+    copies = np.flatnonzero(rep != np.arange(len(hashes)))
+    return first, np.stack([rep[copies], copies], axis=1)
+
+
+def _close_in_bucket(members, hashes, max_distance):
+    """
+    All close pairs inside one band bucket, compared in BLOCK x BLOCK tiles so
+    memory stays bounded however large the bucket is.
+    """
+    size = len(members)
+    found = []
+    for r0 in range(0, size, BLOCK):
+        rows = members[r0:r0 + BLOCK]
+        for c0 in range(r0, size, BLOCK):
+            cols = members[c0:c0 + BLOCK]
+            close = popcount64(hashes[rows][:, None] ^ hashes[cols][None, :]) <= max_distance
+            if c0 == r0:
+                close &= np.triu(np.ones(close.shape, dtype=bool), k=1)
+            a, b = np.nonzero(close)
+            if len(a):
+                i, j = rows[a], cols[b]
+                found.append(np.stack([np.minimum(i, j), np.maximum(i, j)], axis=1))
+    return found
+
+
+def find_pairs(hashes, max_distance):
+    """
+    Multi-index Hamming search.
+
+    Identical hashes (fixed-camera frames, shared backgrounds) are linked to
+    one representative first, so only distinct hashes enter the band search.
+    Returns: int array (m, 2) of index pairs i < j whose union gives every
+    cluster of images within max_distance of each other.
+    """
+    unique_idx, exact = _exact_pairs(hashes)
+    unique = hashes[unique_idx]
+
+    n_bands = max_distance + 1
+    edges = np.linspace(0, 64, n_bands + 1).astype(int)
+    found = []
+
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        mask = np.uint64((1 << (hi - lo)) - 1)
+        keys = (unique >> np.uint64(lo)) & mask
+
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        sizes = np.diff(np.r_[starts, len(keys)])
+
+        for start, size in zip(starts[sizes > 1], sizes[sizes > 1]):
+            found.extend(_close_in_bucket(order[start:start + size], unique, max_distance))
+
+    near = np.zeros((0, 2), dtype=np.int64)
+    if found:
+        # A pair can match on several bands; dedupe as flat i * n + j keys.
+        n = np.int64(len(unique))
+        flat = np.unique(np.concatenate(found).astype(np.int64) @ np.array([n, 1]))
+        near = np.stack([flat // n, flat % n], axis=1)
+    # Back to indices into `hashes`.
+    near = np.sort(unique_idx[near], axis=1)
+    return np.concatenate([exact, near]).astype(np.int64)
+
+
+def clusters_from_pairs(n, pairs):
+    """
+    Connected components of the duplicate pairs, by vectorized min-label
+    propagation with pointer jumping. Returns: list of index lists (size >= 2).
+    """
+    labels = np.arange(n)
+    i, j = pairs[:, 0], pairs[:, 1]
+    while True:
+        low = np.minimum(labels[i], labels[j])
+        updated = labels.copy()
+        np.minimum.at(updated, i, low)
+        np.minimum.at(updated, j, low)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+
+    members = np.unique(pairs)
+    order = np.argsort(labels[members], kind="stable")
+    members = members[order]
+    splits = np.flatnonzero(np.diff(labels[members])) + 1
+    return [g.tolist() for g in np.split(members, splits) if len(g) > 1]
+
+
+def prune_leaks(root, manifest, splits, leaks):
+    """
+    Takes the val members of every leak cluster out of val.
+    With list-based splits they are reassigned to train (nothing is moved);
+    with folder splits the image + label are moved into QUARANTINE_DIR.
+    Returns: number of images pruned from val.
+    """
+    leaked = [p for cluster in leaks for p in cluster if splits.get(p) == "val"]
+    assign_path = os.path.join(root, ASSIGN_FILE)
+
+    if os.path.exists(assign_path):
+        with open(assign_path, "r") as f:
+            assignments = json.load(f)
+        for rel in leaked:
+            assignments[rel] = "train"
+        with open(assign_path, "w") as f:
+            json.dump(assignments, f, indent=0, sort_keys=True)
+        write_lists(root, assignments)
+        return len(leaked)
+
+    for rel in leaked:
+        for item in (rel, manifest["entries"][rel]["label"]):
+            if item is None:
+                continue
+            dst = os.path.join(QUARANTINE_DIR, item)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.move(os.path.join(root, item), dst)
+    return len(leaked)
+
+
+def find_duplicates():
+    args = parse_args()
+
+    manifest = build_manifest(args.root)
+    splits = {p: e["split"] for p, e in manifest["entries"].items()}
+    paths, hashes = load_hashes(args.root, manifest)
+    print(f"{len(paths)} images hashed.")
+
+    pairs = find_pairs(hashes, args.distance)
+    clusters = [[paths[i] for i in c] for c in clusters_from_pairs(len(paths), pairs)]
+    leaks = [
+        c for c in clusters
+        if len({splits.get(p) for p in c} & {"train", "val"}) > 1
+    ]
+
+    redundant = sum(len(c) - 1 for c in clusters)
+    print(f"Near-duplicate clusters: {len(clusters)} ({redundant} redundant images)")
+    print(f"Clusters leaking across splits: {len(leaks)}")
+    for cluster in leaks[:10]:
+        print("  " + ", ".join(cluster))
+
+    with open(os.path.join(args.root, REPORT_FILE), "w") as f:
+        json.dump({"max_distance": args.distance, "clusters": clusters, "leaks": leaks}, f, indent=1)
+    print(f"Report written to {os.path.join(args.root, REPORT_FILE)}")
+
+    if args.prune and leaks:
+        pruned = prune_leaks(args.root, manifest, splits, leaks)
+        print(f"Took {pruned} leaked images out of val.")
+
+
+if __name__ == "__main__":
+    find_duplicates()
@@ -12,23 +12,29 @@ Usage:
 
     # Live mode (Raspberry Pi with USB webcam):
     python main.py --source 0
+
+    # Also collect 'Normal' frames in the background while the print is clean:
+    python main.py --source 0 --collect
 """
 
 import argparse
 import time
+from contextlib import nullcontext
 
 import cv2
 
 from src.camera import Camera
+from src.datacollector import DataCollector
 from src.detector import Detector
 from src.printer_interface import PrinterInterface
 
 # --- CONFIGURATION ---
 DEFAULT_MODEL  = r"runs\detect\3d_print_monitor\yolov8s_centered_synthetic2\weights\best.pt"
 CONF_THRESHOLD = 0.55       # Confidence to count a detection
-PERSISTENCE    = 5          # Consecutive frames needed before pausing printer
+PERSISTENCE    = 5          # Frames a tracked defect must be seen in before pausing printer
 TARGET_FPS     = 1          # How many frames per second to analyse (1 is enough)
 DISPLAY        = True       # Show annotated frames in a window (set False on Pi)
+COLLECT_DIR    = "data/collected/normal"   # Where --collect saves healthy frames
 
 
 def parse_args():
@@ -39,7 +45,8 @@ def parse_args():
     )
     parser.add_argument(
         "--model", default=DEFAULT_MODEL,
-        help="Path to trained YOLOv8 .pt weights."
+        help="Path to trained YOLOv8 weights, or a variants manifest.json "
+             "from export_variants.py."
     )
     parser.add_argument(
         "--conf", type=float, default=CONF_THRESHOLD,
@@ -47,7 +54,15 @@ def parse_args():
     )
     parser.add_argument(
         "--persistence", type=int, default=PERSISTENCE,
-        help="Consecutive frames required to trigger a pause."
+        help="Frames a tracked defect must be seen in to trigger a pause."
+    )
+    parser.add_argument(
+        "--hot-path", action="store_true",
+        help="Reuse preallocated pre/postprocessing buffers (lower per-frame allocations)."
+    )
+    parser.add_argument(
+        "--collect", action="store_true",
+        help=f"Save sampled defect-free frames to {COLLECT_DIR} in the background."
     )
     return parser.parse_args()
 
@@ -81,17 +96,19 @@ def main():
         model_path=args.model,
         conf=args.conf,
         persistence_frames=args.persistence,
+        hot_path=args.hot_path,
     )
     printer = PrinterInterface()
+    collector = DataCollector(output_dir=COLLECT_DIR) if args.collect else None
     frame_interval = 1.0 / TARGET_FPS
 
     print(f"[Main] Starting monitoring — source: {source}")
-    print(f"[Main] Persistence filter: {args.persistence} consecutive frames")
+    print(f"[Main] Persistence filter: {args.persistence} frames per tracked defect")
     print(f"[Main] Press 'q' to quit.\n")
 
     paused = False
 
-    with Camera(source=source) as cam:
+    with Camera(source=source) as cam, (collector or nullcontext()):
         while True:
             loop_start = time.time()
 
@@ -102,6 +119,14 @@ def main():
 
             should_pause, detections = detector.trigger(frame)
 
+            # Healthy frame: hand it to the collector (non-blocking, no copy).
+            # A clean frame while a defect is still tracked is flicker, and
+            # frames after a pause show a failed print — neither is 'Normal'.
+            offered = False
+            if (collector is not None and not detections
+                    and detector.consecutive_hits == 0 and not paused):
+                offered = collector.offer(frame)
+
             if detections:
                 names = [d["class_name"] for d in detections]
                 print(f"[Detector] Frame hit {detector.consecutive_hits}/{args.persistence} — {names}")
@@ -115,8 +140,10 @@ def main():
                     print("[Main] Printer paused. Monitoring continues.")
 
             if DISPLAY:
+                # Camera returns a fresh frame every read, so drawing can go
+                # straight onto it — unless the collector still holds it.
                 annotated = draw_detections(
-                    frame.copy(), detections,
+                    frame.copy() if offered else frame, detections,
                     detector.consecutive_hits, args.persistence
                 )
                 cv2.imshow("3D Print Monitor", annotated)
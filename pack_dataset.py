@@ -0,0 +1,57 @@
+"""
+Converts data/processed between the YOLO folder layout and the packed
+shard format (see src/packed_dataset.py), and prints dataset stats straight
+from the packed index without touching the image files.
+
+Usage:
+    python pack_dataset.py pack                 # data/processed -> data/packed
+    python pack_dataset.py info                 # counts per split and class
+    python pack_dataset.py unpack --dst data/unpacked
+"""
+
+import argparse
+
+from src.packed_dataset import PackedDataset, pack_yolo, unpack_to_yolo
+
+# --- CONFIGURATION ---
+YOLO_ROOT   = "data/processed"
+PACKED_ROOT = "data/packed"
+CLASS_NAMES = ["Spaghetti", "Warping", "Layer_shifting", "Stringing", "Offplatfrom", "Cracking"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Packed dataset converter")
+    parser.add_argument("command", choices=["pack", "unpack", "info"])
+    parser.add_argument("--src", default=YOLO_ROOT, help="YOLO dataset root (pack).")
+    parser.add_argument("--packed", default=PACKED_ROOT, help="Packed dataset folder.")
+    parser.add_argument("--dst", default=YOLO_ROOT, help="Output YOLO root (unpack).")
+    return parser.parse_args()
+
+
+def print_info(packed_root):
+    ds = PackedDataset(packed_root)
+    print(f"Packed dataset: {packed_root} — {len(ds)} images")
+    for split in ds.split_names:
+        idx = ds.indices(split)
+        labelled = ds.columns["has_label"][idx]
+        negatives = int((labelled & (ds.columns["label_count"][idx] == 0)).sum())
+        unlabelled = int((~labelled).sum())
+        print(f"\n  {split}: {len(idx)} images ({negatives} negatives, {unlabelled} without labels)")
+        for class_id, count in enumerate(ds.class_counts(split)):
+            name = CLASS_NAMES[class_id] if class_id < len(CLASS_NAMES) else str(class_id)
+            print(f"    {name:<15} {int(count)}")
+    ds.close()
+
+
+def main():
+    args = parse_args()
+    if args.command == "pack":
+        pack_yolo(args.src, args.packed)
+    elif args.command == "unpack":
+        unpack_to_yolo(args.packed, args.dst)
+    else:
+        print_info(args.packed)
+
+
+if __name__ == "__main__":
+    main()
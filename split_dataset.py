@@ -1,69 +1,166 @@
 """
-One-time utility: splits data/processed/images/train into 80% train / 20% val.
-Run this ONCE before retraining. It moves files in-place, so originals are gone from train/.
+Splits data/processed into train / val without moving or copying any data.
+
+- Non-destructive: writes train.txt / val.txt image lists next to images/
+  (ultralytics reads these directly; see configs/defect_data.yaml), or with
+  --links a hardlinked images/labels tree under data/split/.
+- Stratified: every image is put in a stratum by the rarest class in its label
+  file; empty-label negatives and unlabeled images get their own strata, so
+  val keeps the same class balance as train.
+- Incremental: assignments are remembered in splits.json. Later runs only
+  assign images that are new since the last run, topping each stratum up to
+  VAL_RATIO, so existing train/val membership never changes.
+
+Uses the manifest from src/dataset_index.py, so only changed label files are
+re-read and 100k+ images split in seconds.
 
 Usage:
     python split_dataset.py
+    python split_dataset.py --links
 """
 
+import argparse
+import json
 import os
 import shutil
-import random
 
-IMAGES_TRAIN = "data/processed/images/train"
-LABELS_TRAIN = "data/processed/labels/train"
-IMAGES_VAL   = "data/processed/images/val"
-LABELS_VAL   = "data/processed/labels/val"
+import numpy as np
+
+from src.dataset_index import ASSIGN_FILE, build_manifest
+
+BASE_DIR     = "data/processed"
+LINK_ROOT    = "data/split"         # Output of --links
 
 VAL_RATIO = 0.20
 SEED = 42
 
-def split():
-    random.seed(SEED)
 
-    os.makedirs(IMAGES_VAL, exist_ok=True)
-    os.makedirs(LABELS_VAL, exist_ok=True)
+def parse_args():
+    parser = argparse.ArgumentParser(description="Stratified, incremental train/val split")
+    parser.add_argument("--root", default=BASE_DIR, help="Dataset root (images/, labels/).")
+    parser.add_argument("--val-ratio", type=float, default=VAL_RATIO)
+    parser.add_argument("--links", action="store_true",
+                        help=f"Also build a hardlinked images/labels tree in {LINK_ROOT}.")
+    return parser.parse_args()
 
-    images = [
-        f for f in os.listdir(IMAGES_TRAIN)
-        if f.lower().endswith(('.jpg', '.jpeg', '.png'))
-    ]
 
-    if not images:
-        print(f"No images found in {IMAGES_TRAIN}. Nothing to split.")
-        return
+def stratum_of(entry, class_frequency):
+    """Rarest class present in the image, or 'negative' / 'unlabeled'."""
+    if entry["label"] is None:
+        return "unlabeled"
+    if not entry["classes"]:
+        return "negative"
+    return min(entry["classes"], key=lambda c: (class_frequency.get(c, 0), int(c)))
+
+
+def assign(entries, previous, val_ratio, seed):
+    """
+    Keeps previous assignments and splits only new images, per stratum.
+    Returns: dict image path -> 'train' | 'val'
+    """
+    class_frequency = {}
+    for entry in entries.values():
+        for class_id, count in entry["classes"].items():
+            class_frequency[class_id] = class_frequency.get(class_id, 0) + count
+
+    assignments = {p: s for p, s in previous.items() if p in entries}
 
-    random.shuffle(images)
-    n_val = max(1, int(len(images) * VAL_RATIO))
-    val_images = images[:n_val]
-    train_images = images[n_val:]
+    strata = {}
+    for path in sorted(entries):
+        strata.setdefault(stratum_of(entries[path], class_frequency), []).append(path)
 
-    moved = 0
-    skipped = 0
+    rng = np.random.default_rng(seed + len(assignments))
+    for name in sorted(strata):
+        members = strata[name]
+        new = [p for p in members if p not in assignments]
+        if not new:
+            continue
 
-    for fname in val_images:
-        stem = os.path.splitext(fname)[0]
-        label_fname = stem + ".txt"
+        n_val_now = sum(assignments.get(p) == "val" for p in members)
+        n_val_target = int(round(len(members) * val_ratio))
+        n_val_new = min(max(n_val_target - n_val_now, 0), len(new))
 
-        src_img = os.path.join(IMAGES_TRAIN, fname)
-        dst_img = os.path.join(IMAGES_VAL, fname)
-        src_lbl = os.path.join(LABELS_TRAIN, label_fname)
-        dst_lbl = os.path.join(LABELS_VAL, label_fname)
+        picked = set(rng.permutation(len(new))[:n_val_new].tolist())
+        for k, path in enumerate(new):
+            assignments[path] = "val" if k in picked else "train"
 
-        shutil.move(src_img, dst_img)
+    return assignments
 
-        if os.path.exists(src_lbl):
-            shutil.move(src_lbl, dst_lbl)
-        else:
-            # Create empty label for negatives that had no label file
-            open(dst_lbl, 'w').close()
 
-        moved += 1
+def write_lists(root, assignments):
+    for split in ("train", "val"):
+        paths = sorted(p for p, s in assignments.items() if s == split)
+        with open(os.path.join(root, f"{split}.txt"), "w") as f:
+            f.writelines(f"./{p}\n" for p in paths)
+
+
+def _link(src, dst):
+    if os.path.exists(dst):
+        return
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        # Different drive or filesystem without hardlinks: fall back to a copy.
+        shutil.copy2(src, dst)
+
+
+def write_links(root, entries, assignments, link_root):
+    """Hardlinks each image (and label) into <link_root>/{images,labels}/<split>/."""
+    wanted = set()
+    for path, split in assignments.items():
+        fname = os.path.basename(path)
+        items = [(path, os.path.join(link_root, "images", split, fname))]
+        label = entries[path]["label"]
+        if label is not None:
+            stem = os.path.splitext(fname)[0]
+            items.append((label, os.path.join(link_root, "labels", split, stem + ".txt")))
+        for src, dst in items:
+            _link(os.path.join(root, src), dst)
+            wanted.add(os.path.normpath(dst))
+
+    # Drop links for images that were removed from the dataset.
+    for kind in ("images", "labels"):
+        for split in ("train", "val"):
+            folder = os.path.join(link_root, kind, split)
+            if not os.path.isdir(folder):
+                continue
+            for entry in os.scandir(folder):
+                if os.path.normpath(entry.path) not in wanted:
+                    os.remove(entry.path)
+
+
+def split():
+    args = parse_args()
+
+    manifest = build_manifest(args.root)
+    entries = manifest["entries"]
+    if not entries:
+        print(f"No images found in {args.root}/images. Nothing to split.")
+        return
 
-    print(f"Split complete.")
-    print(f"  Train: {len(train_images)} images  ->  {IMAGES_TRAIN}")
-    print(f"  Val  : {moved} images             ->  {IMAGES_VAL}")
-    print(f"\nNow update configs/defect_data.yaml: val: images/val")
+    assign_path = os.path.join(args.root, ASSIGN_FILE)
+    previous = {}
+    if os.path.exists(assign_path):
+        with open(assign_path, "r") as f:
+            previous = json.load(f)
+
+    assignments = assign(entries, previous, args.val_ratio, SEED)
+    n_new = sum(p not in previous for p in assignments)
+
+    with open(assign_path, "w") as f:
+        json.dump(assignments, f, indent=0, sort_keys=True)
+    write_lists(args.root, assignments)
+    if args.links:
+        write_links(args.root, entries, assignments, LINK_ROOT)
+
+    n_val = sum(s == "val" for s in assignments.values())
+    print(f"Split complete ({n_new} newly assigned, {len(assignments) - n_new} kept).")
+    print(f"  Train: {len(assignments) - n_val} images  ->  {os.path.join(args.root, 'train.txt')}")
+    print(f"  Val  : {n_val} images  ->  {os.path.join(args.root, 'val.txt')}")
+    if args.links:
+        print(f"  Hardlinked tree: {LINK_ROOT}/images/{{train,val}}")
+    print("\nconfigs/defect_data.yaml reads train.txt / val.txt directly.")
     print("Then retrain with: python train.py")
 
 if __name__ == "__main__":
@@ -1,5 +1,197 @@
 """
 Passive data gathering script.
-CURRENT ROLE: Dormant (requires hardware).
+CURRENT ROLE: Optional stage of main.py (--collect). While a print is running
+without detections, it samples the frames Camera already captured and saves
+them as 'Normal' examples, fully in the background.
 FUTURE ROLE: Will be run during long, successful prints on the real machine to collect 'Normal' data samples, which are crucial for teaching the AI what a healthy print looks like in your specific lighting conditions.
-"""
\ No newline at end of file
+"""
+
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+
+class DataCollector:
+    """
+    Low-overhead background sampler of healthy print frames.
+
+    The detection loop only calls offer(frame): a timestamp comparison and a
+    non-blocking queue put. Scene-change filtering, JPEG encoding, writing and
+    disk-budget rotation all happen on a background thread. If that thread
+    falls behind, frames are dropped instead of ever blocking the caller.
+
+    Usage:
+        with DataCollector(output_dir="data/collected/normal") as collector:
+            ...
+            if not detections:
+                collector.offer(frame)
+    """
+
+    def __init__(
+        self,
+        output_dir: str = "data/collected/normal",
+        interval_sec: float = 30.0,
+        max_interval_sec: float = 300.0,
+        change_threshold: float = 8.0,
+        max_bytes: int = 2 * 1024 ** 3,
+        min_free_bytes: int = 500 * 1024 ** 2,
+        jpeg_quality: int = 90,
+    ):
+        """
+        Args:
+            output_dir: Folder the JPGs are written to.
+            interval_sec: Minimum time between two offered frames.
+            max_interval_sec: Save a frame at least this often, even if the
+                    scene barely changed (slow prints still get sampled).
+            change_threshold: Mean absolute pixel change (0–255) on a small
+                    grayscale thumbnail needed to save a frame earlier.
+            max_bytes: Disk budget for output_dir. Oldest files are deleted
+                    first once it is exceeded.
+            min_free_bytes: Also rotate when the disk has less free space
+                    than this (protects the Pi's SD card).
+            jpeg_quality: JPEG quality (0–100).
+        """
+        self.output_dir = output_dir
+        self.interval_sec = interval_sec
+        self.max_interval_sec = max_interval_sec
+        self.change_threshold = change_threshold
+        self.max_bytes = max_bytes
+        self.min_free_bytes = min_free_bytes
+        self.jpeg_quality = jpeg_quality
+
+        # Single slot: if the writer is still busy, new frames are dropped.
+        self._queue = queue.Queue(maxsize=1)
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_offer = float("-inf")
+
+        self._files = deque()       # (path, size), oldest first
+        self._total_bytes = 0
+        self._last_thumb = None
+        self._last_saved = float("-inf")
+        self.saved = 0
+
+    # ------------------------------------------------------------------
+    # Called from the detection loop
+    # ------------------------------------------------------------------
+
+    def offer(self, frame) -> bool:
+        """
+        Hand a frame to the collector. Never blocks.
+
+        The frame is used as-is (no copy), so do not draw on it afterwards.
+
+        Returns:
+            True if the frame was queued for the background thread.
+        """
+        now = time.monotonic()
+        if now - self._last_offer < self.interval_sec:
+            return False
+        try:
+            self._queue.put_nowait((now, frame))
+        except queue.Full:
+            return False
+        self._last_offer = now
+        return True
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Scan existing files for the disk budget and start the writer thread."""
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        existing = []
+        for entry in os.scandir(self.output_dir):
+            if entry.is_file() and entry.name.lower().endswith(".jpg"):
+                st = entry.stat()
+                existing.append((st.st_mtime, entry.path, st.st_size))
+        existing.sort()
+        self._files = deque((path, size) for _, path, size in existing)
+        self._total_bytes = sum(size for _, size in self._files)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="DataCollector", daemon=True)
+        self._thread.start()
+        print(f"[DataCollector] Saving normal frames to {self.output_dir} "
+              f"(budget {self.max_bytes / 1024 ** 2:.0f} MB, {len(self._files)} files already there)")
+
+    def stop(self):
+        """Finish the frame in flight and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        print(f"[DataCollector] Stopped. Saved {self.saved} frames this session.")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Background thread
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            try:
+                offered_at, frame = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._process(offered_at, frame)
+            except Exception as e:
+                print(f"[DataCollector] ERROR saving frame: {e}")
+
+    def _process(self, offered_at, frame):
+        small = cv2.resize(frame, (64, 36), interpolation=cv2.INTER_AREA)
+        thumb = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+        changed = (
+            self._last_thumb is None
+            or np.abs(thumb - self._last_thumb).mean() >= self.change_threshold
+        )
+        if not changed and offered_at - self._last_saved < self.max_interval_sec:
+            return
+
+        ok, encoded = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality])
+        if not ok:
+            return
+
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        path = os.path.join(self.output_dir, f"normal_{stamp}.jpg")
+        with open(path, "wb") as f:
+            f.write(encoded.tobytes())
+
+        self._files.append((path, len(encoded)))
+        self._total_bytes += len(encoded)
+        self._last_thumb = thumb
+        self._last_saved = offered_at
+        self.saved += 1
+
+        self._rotate()
+
+    def _rotate(self):
+        """Delete oldest files until both the budget and free-space floor hold."""
+        while len(self._files) > 1:
+            free = shutil.disk_usage(self.output_dir).free
+            if self._total_bytes <= self.max_bytes and free >= self.min_free_bytes:
+                break
+            path, size = self._files.popleft()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self._total_bytes -= size
@@ -0,0 +1,265 @@
+"""
+Incremental dataset manifest (indexer).
+CURRENT ROLE: One pass over data/processed that records every image/label
+pair with size, mtime, content hash, class histogram and any problems found
+(orphans, '.jpg.txt' double extensions, malformed labels, out-of-range
+coordinates, unknown class ids). Empty labels are intentional negatives
+(prepare_negatives.py) and are counted, not flagged. The manifest is cached
+as JSON; re-runs only re-read files whose size or mtime changed, so
+re-validating a large dataset is mostly a directory listing.
+FUTURE ROLE: The single source of truth other dataset tools (splitting,
+de-duplication) read instead of globbing the folders themselves.
+
+Layout expected (same as configs/defect_data.yaml):
+    <root>/images/<split>/*.jpg|.jpeg|.png
+    <root>/labels/<split>/*.txt
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.utils import IMAGE_EXTENSIONS, parse_yolo_label
+
+MANIFEST_FILE = "manifest.json"
+ASSIGN_FILE = "splits.json"     # Written by split_dataset.py: image path -> split
+UNASSIGNED = "unassigned"       # Split of images added after the last split_dataset.py run
+MANIFEST_VERSION = 3
+NUM_CLASSES = 6         # Must match 'names' in configs/defect_data.yaml
+IO_WORKERS = 8          # Threads used to hash/parse changed files
+
+# Problem codes written into the manifest.
+MISSING_LABEL = "missing_label"
+ORPHAN_LABEL = "orphan_label"
+DOUBLE_EXTENSION = "double_extension"
+MALFORMED_LABEL = "malformed_label"
+OUT_OF_RANGE = "out_of_range"
+UNKNOWN_CLASS = "unknown_class"
+
+
+def _scan(root, kind, suffixes):
+    """
+    Lists <root>/<kind>/<split>/* in one pass.
+    Returns: dict relative path -> (size, mtime_ns)
+    """
+    found = {}
+    base = os.path.join(root, kind)
+    if not os.path.isdir(base):
+        return found
+
+    for split_dir in os.scandir(base):
+        if not split_dir.is_dir():
+            continue
+        for entry in os.scandir(split_dir.path):
+            if entry.is_file() and entry.name.lower().endswith(suffixes):
+                st = entry.stat()
+                found[f"{kind}/{split_dir.name}/{entry.name}"] = (st.st_size, st.st_mtime_ns)
+    return found
+
+
+def _index_image(root, rel, stat):
+    with open(os.path.join(root, rel), "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    return {"size": stat[0], "mtime_ns": stat[1], "sha1": digest}
+
+
+def _index_label(root, rel, stat, num_classes):
+    with open(os.path.join(root, rel), "rb") as f:
+        data = f.read()
+
+    record = {
+        "size": stat[0],
+        "mtime_ns": stat[1],
+        "sha1": hashlib.sha1(data).hexdigest(),
+        "n_objects": 0,
+        "classes": {},
+        "problems": [],
+    }
+
+    try:
+        cls, boxes = parse_yolo_label(data.decode("utf-8", errors="replace"), source=rel)
+    except ValueError as e:
+        record["problems"].append(MALFORMED_LABEL)
+        record["error"] = str(e)
+        return record
+
+    if len(cls) == 0:
+        return record       # Negative image
+
+    if (boxes < 0).any() or (boxes > 1).any() or (boxes[:, 2:] <= 0).any():
+        record["problems"].append(OUT_OF_RANGE)
+    if (cls >= num_classes).any():
+        record["problems"].append(UNKNOWN_CLASS)
+
+    ids, counts = np.unique(cls, return_counts=True)
+    record["n_objects"] = int(len(cls))
+    record["classes"] = {str(int(i)): int(c) for i, c in zip(ids, counts)}
+    return record
+
+
+def load_splits(root, image_paths):
+    """
+    Split of every image: from <root>/splits.json once split_dataset.py has
+    been run, otherwise the images/<split> folder the image sits in. Images
+    missing from splits.json are UNASSIGNED.
+    Returns: dict image path -> split
+    """
+    assign_path = os.path.join(root, ASSIGN_FILE)
+    if os.path.exists(assign_path):
+        with open(assign_path, "r") as f:
+            assigned = json.load(f)
+        return {p: assigned.get(p, UNASSIGNED) for p in image_paths}
+    return {p: p.split("/", 2)[1] for p in image_paths}
+
+
+def load_manifest(manifest_path):
+    """Returns the cached manifest, or {} if missing, unreadable or outdated."""
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest
+
+
+def _refresh(root, current, cached, index_fn):
+    """
+    Reuses cached records whose size and mtime are unchanged and re-indexes
+    the rest on a thread pool.
+    Returns: (records, number of files re-read)
+    """
+    records = {}
+    todo = []
+    for rel, stat in current.items():
+        old = cached.get(rel)
+        if old and old["size"] == stat[0] and old["mtime_ns"] == stat[1]:
+            records[rel] = old
+        else:
+            todo.append(rel)
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=IO_WORKERS) as pool:
+            for rel, record in zip(todo, pool.map(lambda r: index_fn(r, current[r]), todo)):
+                records[rel] = record
+    return records, len(todo)
+
+
+def build_manifest(root, manifest_path=None, num_classes=NUM_CLASSES):
+    """
+    Indexes <root> and writes the manifest (default <root>/manifest.json).
+
+    Returns:
+        dict with keys:
+            - 'images' / 'labels': per-file records (size, mtime_ns, sha1, ...)
+            - 'entries': image path -> {'split', 'label', 'n_objects',
+              'classes', 'problems'}; 'split' comes from load_splits()
+            - 'orphan_labels': label files with no matching image
+            - 'summary': per-split counts (negatives = valid empty labels)
+              and per-problem totals
+            - 'reindexed': how many files had to be re-read this run
+    """
+    manifest_path = manifest_path or os.path.join(root, MANIFEST_FILE)
+    cached = load_manifest(manifest_path)
+
+    images, n_img = _refresh(
+        root, _scan(root, "images", IMAGE_EXTENSIONS), cached.get("images", {}),
+        lambda rel, st: _index_image(root, rel, st),
+    )
+    labels, n_lbl = _refresh(
+        root, _scan(root, "labels", (".txt",)), cached.get("labels", {}),
+        lambda rel, st: _index_label(root, rel, st, num_classes),
+    )
+
+    splits = load_splits(root, images)
+    entries = {}
+    claimed = set()
+    summary = {"splits": {}, "problems": {}}
+
+    for rel in sorted(images):
+        _, folder, fname = rel.split("/", 2)
+        split = splits[rel]
+        stem = os.path.splitext(fname)[0]
+        label = f"labels/{folder}/{stem}.txt"
+        double = f"labels/{folder}/{fname}.txt"
+        problems = []
+
+        if label not in labels:
+            if double in labels:
+                label = double
+                problems.append(DOUBLE_EXTENSION)
+            else:
+                label = None
+                problems.append(MISSING_LABEL)
+
+        record = labels.get(label, {})
+        if label:
+            claimed.add(label)
+            problems.extend(record["problems"])
+
+        entries[rel] = {
+            "split": split,
+            "label": label,
+            "n_objects": record.get("n_objects", 0),
+            "classes": record.get("classes", {}),
+            "problems": problems,
+        }
+
+        stats = summary["splits"].setdefault(
+            split, {"images": 0, "objects": 0, "negatives": 0, "classes": {}}
+        )
+        stats["images"] += 1
+        stats["objects"] += entries[rel]["n_objects"]
+        if label and not problems and entries[rel]["n_objects"] == 0:
+            stats["negatives"] += 1
+        for class_id, count in entries[rel]["classes"].items():
+            stats["classes"][class_id] = stats["classes"].get(class_id, 0) + count
+        for problem in problems:
+            summary["problems"][problem] = summary["problems"].get(problem, 0) + 1
+
+    orphan_labels = sorted(set(labels) - claimed)
+    if orphan_labels:
+        summary["problems"][ORPHAN_LABEL] = len(orphan_labels)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "images": images,
+        "labels": labels,
+        "entries": entries,
+        "orphan_labels": orphan_labels,
+        "summary": summary,
+    }
+
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+    manifest["reindexed"] = n_img + n_lbl
+    return manifest
+
+
+def fix_double_extensions(root, manifest):
+    """
+    Renames every 'name.jpg.txt' label the manifest flagged to 'name.txt'
+    (what fix_labels.py used to do). Existing 'name.txt' files are never
+    overwritten.
+    Returns: number of files renamed.
+    """
+    renamed = 0
+    for rel, entry in manifest["entries"].items():
+        if DOUBLE_EXTENSION not in entry["problems"]:
+            continue
+        _, split, fname = rel.split("/", 2)
+        src = os.path.join(root, entry["label"])
+        dst = os.path.join(root, "labels", split, os.path.splitext(fname)[0] + ".txt")
+        if not os.path.exists(dst):
+            os.rename(src, dst)
+            renamed += 1
+    return renamed
@@ -1,26 +1,82 @@
 """
 The AI Inference Engine wrapper.
 CURRENT ROLE: Loads the YOLOv8 model and runs detection on incoming frames,
-with a persistence/debounce filter to suppress single-frame false positives.
+with a per-object persistence filter (IoU tracker) to suppress single-frame
+false positives.
 FUTURE ROLE: Fine-tune confidence threshold and persistence window based on
 real-world false positive/negative rates observed during live monitoring.
 """
 
 from ultralytics import YOLO
+import json
 import os
 
+import cv2
+import numpy as np
+
+from src.tracker import Tracker
+
+
+class FrameDetections:
+    """
+    Detections of one frame, backed by arrays the Detector reuses every frame.
+
+    Returned by Detector.detect() in hot-path mode. boxes / confidences /
+    class_ids are views that are only valid until the next detect() call;
+    copy them if they must outlive the frame. Iterating yields the same dicts
+    as the default mode (built lazily, so only when something reads them).
+    """
+
+    def __init__(self, names, max_det):
+        self.names = names
+        self._boxes = np.zeros((max_det, 4), dtype=np.float32)
+        self._confidences = np.zeros(max_det, dtype=np.float32)
+        self._class_ids = np.zeros(max_det, dtype=np.int64)
+        self.count = 0
+
+    @property
+    def boxes(self):
+        """(n, 4) float32 [x1, y1, x2, y2] in frame pixels."""
+        return self._boxes[:self.count]
+
+    @property
+    def confidences(self):
+        return self._confidences[:self.count]
+
+    @property
+    def class_ids(self):
+        return self._class_ids[:self.count]
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for i in range(self.count):
+            class_id = int(self._class_ids[i])
+            yield {
+                "class_id":   class_id,
+                "class_name": self.names[class_id],
+                "confidence": float(self._confidences[i]),
+                "box":        self._boxes[i].tolist(),
+            }
+
 
 class Detector:
     """
     Wraps YOLOv8 inference with a persistence filter.
 
     The persistence filter prevents spurious printer pauses by requiring
-    a defect to appear in N consecutive frames before raising an alert.
-    At 1 FPS, PERSISTENCE_FRAMES=5 means a defect must be visible for
-    5 seconds continuously before the printer is paused.
+    the same defect to be tracked over N frames before raising an alert.
+    Detections are associated between frames by IoU (see src/tracker.py),
+    so a track tolerates a few flickering frames without losing its hits,
+    while unrelated detections elsewhere in the frame do not add up.
+    At 1 FPS, PERSISTENCE_FRAMES=5 means a defect must be seen in 5 frames
+    before the printer is paused.
     """
 
     DEFAULT_MODEL = r"runs\detect\3d_print_monitor\yolov8s_centered_synthetic2\weights\best.pt"
+    HOT_PATH_IMGSZ = 640     # Square input size in hot-path mode when imgsz is not given
+    PAD_VALUE = 114          # Letterbox border colour, same as ultralytics
 
     def __init__(
         self,
@@ -28,15 +84,34 @@ class Detector:
         conf: float = 0.55,
         iou: float = 0.50,
         persistence_frames: int = 5,
+        max_misses: int = 2,
+        imgsz=None,
+        hot_path: bool = False,
+        max_det: int = 100,
     ):
         """
         Args:
-            model_path: Path to trained .pt weights file.
+            model_path: Path to trained .pt/.onnx weights, or to a variants
+                manifest.json written by export_variants.py (the recommended
+                variant and its input size are then used).
             conf: Minimum confidence to count a detection (0–1).
             iou: IOU threshold for non-maximum suppression (0–1).
-            persistence_frames: Number of consecutive frames a defect must
+            persistence_frames: Number of frames a tracked defect must
                 appear in before trigger() returns True.
+            max_misses: Consecutive frames a tracked defect may go undetected
+                before its track (and its hits) is dropped.
+            imgsz: Inference input size. None uses the manifest's size, or the
+                model's own default for plain weights.
+            hot_path: Run letterboxing, colour conversion and normalization
+                in preallocated buffers and fill reusable output arrays
+                instead of going through model.predict(). detect() then
+                returns a FrameDetections that is overwritten every frame.
+            max_det: Maximum detections kept per frame (hot path).
         """
+        if model_path.endswith(".json"):
+            model_path, manifest_imgsz = self._resolve_manifest(model_path)
+            imgsz = imgsz or manifest_imgsz
+
         if not os.path.exists(model_path):
             raise FileNotFoundError(
                 f"Model weights not found: {model_path}\n"
@@ -44,14 +119,116 @@ class Detector:
             )
 
         print(f"[Detector] Loading model: {model_path}")
-        self.model = YOLO(model_path)
+        self.model = YOLO(model_path, task="detect")
         self.conf = conf
         self.iou = iou
+        self.imgsz = imgsz
         self.persistence_frames = persistence_frames
+        self.hot_path = hot_path
+        self.max_det = max_det
 
-        # Rolling counter — increments each frame a defect is detected,
-        # resets to 0 on any clean frame.
-        self._consecutive_hits = 0
+        if hot_path:
+            self._init_hot_path(model_path)
+
+        # One track per defect; hits survive up to max_misses clean frames.
+        self.tracker = Tracker(confirm_hits=persistence_frames, max_misses=max_misses)
+
+    @staticmethod
+    def _resolve_manifest(manifest_path):
+        """
+        Reads a variants manifest and returns (weights path, imgsz) of the
+        recommended variant. Paths in the manifest are relative to it.
+        """
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(
+                f"Variants manifest not found: {manifest_path}\n"
+                "Run python export_variants.py --weights <best.pt> first."
+            )
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+
+        for variant in manifest["variants"]:
+            if variant["name"] == manifest["recommended"]:
+                path = os.path.join(os.path.dirname(manifest_path), variant["path"])
+                print(f"[Detector] Manifest variant: {variant['name']} (imgsz {variant['imgsz']})")
+                return path, variant["imgsz"]
+
+        raise ValueError(f"Recommended variant missing from manifest: {manifest_path}")
+
+    # ------------------------------------------------------------------
+    # Hot path: preallocated buffers, no per-frame result objects
+    # ------------------------------------------------------------------
+
+    def _init_hot_path(self, model_path):
+        import torch
+        from ultralytics.nn.autobackend import AutoBackend
+
+        # .pt weights are already loaded by YOLO(); other formats need their runtime.
+        weights = self.model.model if model_path.endswith(".pt") else model_path
+        self._backend = AutoBackend(weights, device=torch.device("cpu"), fuse=True, verbose=False)
+
+        size = self.imgsz or self.HOT_PATH_IMGSZ
+        self.imgsz = size
+        self._input = np.empty((1, 3, size, size), dtype=np.float32)
+        self._tensor = torch.from_numpy(self._input)    # shares memory with _input
+        self._scale = np.float32(1 / 255)
+        self._frame_shape = None
+        self._output = FrameDetections(self.model.names, self.max_det)
+        self._backend.warmup(imgsz=(1, 3, size, size))
+
+    def _prepare_buffers(self, frame_shape):
+        """(Re)allocate the letterbox buffers. Only runs when the frame size changes."""
+        frame_h, frame_w = frame_shape[:2]
+        size = self.imgsz
+        gain = min(size / frame_h, size / frame_w)
+        new_w, new_h = int(round(frame_w * gain)), int(round(frame_h * gain))
+        left, top = (size - new_w) // 2, (size - new_h) // 2
+
+        self._resized = np.empty((new_h, new_w, 3), dtype=np.uint8)
+        self._input.fill(self.PAD_VALUE / 255)     # the border never changes
+        self._roi = self._input[0, :, top:top + new_h, left:left + new_w]
+        self._gain = np.float32(gain)
+        self._offset = np.array([left, top, left, top], dtype=np.float32)
+        self._clip_max = np.array([frame_w, frame_h, frame_w, frame_h], dtype=np.float32)
+        self._frame_shape = frame_shape
+
+    def _preprocess(self, frame):
+        """Letterbox + BGR->RGB + HWC->CHW + /255, written straight into _input."""
+        if frame.shape != self._frame_shape:
+            self._prepare_buffers(frame.shape)
+        cv2.resize(frame, self._resized.shape[1::-1], dst=self._resized, interpolation=cv2.INTER_LINEAR)
+        # The channel flip and transpose are views; one ufunc does the conversion.
+        np.multiply(self._resized[..., ::-1].transpose(2, 0, 1), self._scale,
+                    out=self._roi, casting="unsafe")
+
+    def _infer(self):
+        """Runs the model on _input. Returns (n, 6) [x1, y1, x2, y2, conf, cls] in letterbox pixels."""
+        import torch
+        from ultralytics.utils import ops
+
+        with torch.inference_mode():
+            preds = self._backend(self._tensor)
+        det = ops.non_max_suppression(
+            preds, self.conf, self.iou, agnostic=True, max_det=self.max_det,
+        )[0]
+        return det.numpy()
+
+    def _postprocess(self, det):
+        """Maps letterbox boxes back to the frame, in place in the output arrays."""
+        out = self._output
+        n = min(len(det), self.max_det)
+        boxes = out._boxes[:n]
+        np.subtract(det[:n, :4], self._offset, out=boxes)
+        np.divide(boxes, self._gain, out=boxes)
+        np.clip(boxes, 0, self._clip_max, out=boxes)
+        out._confidences[:n] = det[:n, 4]
+        out._class_ids[:n] = det[:n, 5]
+        out.count = n
+        return out
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
 
     def detect(self, frame):
         """
@@ -63,13 +240,21 @@ class Detector:
                 - 'class_name' (str)
                 - 'confidence' (float)
                 - 'box'        (list[float]): [x1, y1, x2, y2] in pixels
+            In hot-path mode a FrameDetections instead, which iterates as
+            the same dicts and is reused by the next call.
         """
+        if self.hot_path:
+            self._preprocess(frame)
+            return self._postprocess(self._infer())
+
+        extra = {"imgsz": self.imgsz} if self.imgsz else {}
         results = self.model.predict(
             source=frame,
             conf=self.conf,
             iou=self.iou,
             agnostic_nms=True,
             verbose=False,
+            **extra,
         )
 
         detections = []
@@ -84,31 +269,34 @@ class Detector:
 
         return detections
 
-    def trigger(self, frame) -> tuple[bool, list]:
+    def trigger(self, frame) -> tuple[bool, "list | FrameDetections"]:
         """
         Detect and apply the persistence filter.
 
         Returns:
             (should_pause, detections)
-            - should_pause (bool): True only when defect seen for
-              persistence_frames consecutive frames.
-            - detections (list[dict]): Raw detections for this frame
-              (useful for display even when not yet triggering).
+            - should_pause (bool): True once a tracked defect is
+              confirmed (seen in persistence_frames frames).
+            - detections (list[dict] | FrameDetections): Raw detections for
+              this frame (useful for display even when not yet triggering).
         """
         detections = self.detect(frame)
 
-        if detections:
-            self._consecutive_hits += 1
+        if isinstance(detections, FrameDetections):
+            boxes, confidences, class_ids = detections.boxes, detections.confidences, detections.class_ids
         else:
-            self._consecutive_hits = 0
+            boxes = np.array([d["box"] for d in detections], dtype=np.float32).reshape(-1, 4)
+            confidences = np.array([d["confidence"] for d in detections], dtype=np.float32)
+            class_ids = np.array([d["class_id"] for d in detections], dtype=np.int64)
 
-        should_pause = self._consecutive_hits >= self.persistence_frames
+        should_pause = self.tracker.update(boxes, confidences, class_ids)
         return should_pause, detections
 
     def reset(self):
-        """Reset the persistence counter (call after printer is paused)."""
-        self._consecutive_hits = 0
+        """Drop all tracks (call after printer is paused)."""
+        self.tracker.reset()
 
     @property
     def consecutive_hits(self) -> int:
-        return self._consecutive_hits
+        """Hits of the most persistent tracked defect (shown in the HUD)."""
+        return self.tracker.max_hits
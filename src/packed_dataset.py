@@ -0,0 +1,289 @@
+"""
+Packed (sharded) dataset storage.
+CURRENT ROLE: Stores the YOLO dataset from data/processed as a handful of
+large shard files holding the encoded image bytes back to back, plus one
+columnar index (index.npz) with the byte offsets, every label, per-image
+class counts and the train/val split. Tools read the index instead of
+walking thousands of tiny files, and images are read by random access
+through a memory map of the shard.
+FUTURE ROLE: The format the Pi and network shares use for large collected
+datasets; convert back to the YOLO folder layout for ultralytics training.
+
+Layout:
+    data/packed/
+        shard_00000.bin     raw .jpg/.png bytes, concatenated
+        shard_00001.bin
+        index.npz           columnar index (see PackedDataset)
+"""
+
+import os
+
+import numpy as np
+
+from src.dataset_index import ASSIGN_FILE, load_splits
+from src.utils import IMAGE_EXTENSIONS, format_yolo_label, read_yolo_label
+
+SHARD_BYTES = 256 * 1024 * 1024     # Start a new shard after ~256 MB
+INDEX_FILE = "index.npz"
+SPLITS = ("train", "val")
+
+
+class PackedDataset:
+    """
+    Read access to a packed dataset.
+
+    Usage:
+        ds = PackedDataset("data/packed")
+        for i in ds.indices("val"):
+            img = ds.read_image(i)
+            cls, boxes = ds.labels(i)
+
+    Index columns (one row per image unless noted):
+        file_name, split, shard, offset, length, has_label, bad_label,
+        label_start, label_count, class_counts (n_images x n_classes),
+        label_cls / label_box (one row per object), split_names, shard_names.
+    """
+
+    def __init__(self, root):
+        """
+        Args:
+            root: Folder containing index.npz and the shard_*.bin files.
+        """
+        index_path = os.path.join(root, INDEX_FILE)
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(
+                f"Packed index not found: {index_path}\n"
+                "Run python pack_dataset.py pack first."
+            )
+
+        self.root = root
+        with np.load(index_path, allow_pickle=False) as index:
+            self.columns = {key: index[key] for key in index.files}
+
+        self.file_names = self.columns["file_name"]
+        self.split = self.columns["split"]
+        self.split_names = list(self.columns["split_names"])
+        self._shards = {}   # shard id -> np.memmap, opened on first read
+
+    def __len__(self):
+        return len(self.file_names)
+
+    def _shard(self, shard_id):
+        if shard_id not in self._shards:
+            path = os.path.join(self.root, str(self.columns["shard_names"][shard_id]))
+            self._shards[shard_id] = np.memmap(path, dtype=np.uint8, mode="r")
+        return self._shards[shard_id]
+
+    def read_bytes(self, i):
+        """Encoded image bytes for image i, as a zero-copy view into the shard."""
+        start = int(self.columns["offset"][i])
+        end = start + int(self.columns["length"][i])
+        return self._shard(int(self.columns["shard"][i]))[start:end]
+
+    def read_image(self, i):
+        """Decode image i to a BGR numpy array (same as cv2.imread)."""
+        import cv2
+
+        return cv2.imdecode(self.read_bytes(i), cv2.IMREAD_COLOR)
+
+    def labels(self, i):
+        """Returns (cls, boxes) for image i, like src.utils.read_yolo_label()."""
+        start = int(self.columns["label_start"][i])
+        end = start + int(self.columns["label_count"][i])
+        return (
+            self.columns["label_cls"][start:end].astype(np.int64),
+            self.columns["label_box"][start:end],
+        )
+
+    def indices(self, split=None):
+        """Row indices of every image in the given split (all images if None)."""
+        if split is None:
+            return np.arange(len(self))
+        return np.flatnonzero(self.split == self.split_names.index(split))
+
+    def class_counts(self, split=None):
+        """Total objects per class, optionally restricted to one split."""
+        counts = self.columns["class_counts"]
+        if split is not None:
+            counts = counts[self.indices(split)]
+        return counts.sum(axis=0)
+
+    def close(self):
+        """Drop the shard memory maps."""
+        self._shards.clear()
+
+
+def pack_yolo(src_root, out_root, splits=SPLITS, shard_bytes=SHARD_BYTES):
+    """
+    Packs a YOLO folder layout (images/<folder>, labels/<folder>) into shards.
+
+    Split membership comes from <src_root>/splits.json when split_dataset.py
+    has been run, otherwise from the images/<split> folder names (see
+    src.dataset_index.load_splits). Images in no requested split are skipped.
+
+    Images are copied byte for byte (no re-encoding). Images without a label
+    file are kept with has_label=False. A '<image>.jpg.txt' label (double
+    extension) is used when '<image>.txt' is missing. Malformed label files
+    are reported and the image is packed with has_label=False and
+    bad_label=True, so unpacking never turns it into an empty (negative)
+    label.
+
+    Returns: number of images packed.
+    """
+    os.makedirs(out_root, exist_ok=True)
+
+    file_names, split_ids, shard_ids, offsets, lengths = [], [], [], [], []
+    has_label, bad_label, label_start, label_count = [], [], [], []
+    all_cls, all_boxes = [], []
+    shard_names = []
+    n_objects = 0
+
+    shard_file = None
+    shard_pos = 0
+
+    images = []
+    img_root = os.path.join(src_root, "images")
+    if os.path.isdir(img_root):
+        for folder in sorted(os.listdir(img_root)):
+            folder_dir = os.path.join(img_root, folder)
+            if os.path.isdir(folder_dir):
+                images.extend(
+                    f"images/{folder}/{f}" for f in sorted(os.listdir(folder_dir))
+                    if f.lower().endswith(IMAGE_EXTENSIONS)
+                )
+    membership = load_splits(src_root, images)
+
+    source = ASSIGN_FILE if os.path.exists(os.path.join(src_root, ASSIGN_FILE)) else "image folders"
+    print(f"[Pack] Split membership from {source}")
+    skipped = sum(membership[rel] not in splits for rel in images)
+    if skipped:
+        print(f"[Pack] WARNING: {skipped} images are in none of {list(splits)} and are not packed.")
+
+    try:
+        for split_id, split in enumerate(splits):
+            rels = [rel for rel in images if membership[rel] == split]
+            print(f"[Pack] {split}: {len(rels)} images")
+
+            for rel in rels:
+                _, folder, fname = rel.split("/", 2)
+                lbl_dir = os.path.join(src_root, "labels", folder)
+                with open(os.path.join(src_root, rel), "rb") as f:
+                    data = f.read()
+
+                if shard_file is None or (shard_pos > 0 and shard_pos + len(data) > shard_bytes):
+                    if shard_file is not None:
+                        shard_file.close()
+                    shard_names.append(f"shard_{len(shard_names):05d}.bin")
+                    shard_file = open(os.path.join(out_root, shard_names[-1]), "wb")
+                    shard_pos = 0
+
+                shard_file.write(data)
+
+                lbl_path = os.path.join(lbl_dir, os.path.splitext(fname)[0] + ".txt")
+                if not os.path.exists(lbl_path):
+                    lbl_path = os.path.join(lbl_dir, fname + ".txt")
+                cls = np.zeros(0, dtype=np.int64)
+                boxes = np.zeros((0, 4), dtype=np.float32)
+                labelled = os.path.exists(lbl_path)
+                bad = False
+                if labelled:
+                    try:
+                        cls, boxes = read_yolo_label(lbl_path)
+                    except ValueError as e:
+                        print(f"[Pack] WARNING: {e} — packed without labels.")
+                        labelled, bad = False, True
+
+                file_names.append(fname)
+                split_ids.append(split_id)
+                shard_ids.append(len(shard_names) - 1)
+                offsets.append(shard_pos)
+                lengths.append(len(data))
+                has_label.append(labelled)
+                bad_label.append(bad)
+                label_start.append(n_objects)
+                label_count.append(len(cls))
+                all_cls.append(cls)
+                all_boxes.append(boxes)
+
+                shard_pos += len(data)
+                n_objects += len(cls)
+    finally:
+        if shard_file is not None:
+            shard_file.close()
+
+    label_cls = np.concatenate(all_cls) if all_cls else np.zeros(0, dtype=np.int64)
+    label_box = np.concatenate(all_boxes) if all_boxes else np.zeros((0, 4), dtype=np.float32)
+
+    # Per-image class histogram: one bincount over (image, class) pairs.
+    n_images = len(file_names)
+    n_classes = int(label_cls.max()) + 1 if len(label_cls) else 0
+    owner = np.repeat(np.arange(n_images), label_count)
+    class_counts = np.zeros((n_images, n_classes), dtype=np.uint32)
+    if n_classes:
+        flat = np.bincount(owner * n_classes + label_cls, minlength=n_images * n_classes)
+        class_counts[:] = flat.reshape(n_images, n_classes)
+
+    np.savez(
+        os.path.join(out_root, INDEX_FILE),
+        file_name=np.array(file_names, dtype=str),
+        split=np.array(split_ids, dtype=np.uint8),
+        split_names=np.array(splits, dtype=str),
+        shard=np.array(shard_ids, dtype=np.uint32),
+        shard_names=np.array(shard_names, dtype=str),
+        offset=np.array(offsets, dtype=np.uint64),
+        length=np.array(lengths, dtype=np.uint64),
+        has_label=np.array(has_label, dtype=bool),
+        bad_label=np.array(bad_label, dtype=bool),
+        label_start=np.array(label_start, dtype=np.uint64),
+        label_count=np.array(label_count, dtype=np.uint32),
+        label_cls=label_cls.astype(np.uint16),
+        label_box=label_box.astype(np.float32),
+        class_counts=class_counts,
+    )
+
+    print(f"[Pack] {n_images} images, {n_objects} objects, {len(shard_names)} shard(s) -> {out_root}")
+    if any(bad_label):
+        print(f"[Pack] {sum(bad_label)} malformed label file(s) were not packed; "
+              "run python directory_check.py to list them.")
+    return n_images
+
+
+def unpack_to_yolo(packed_root, out_root):
+    """
+    Writes a packed dataset back out as the YOLO folder layout ultralytics
+    expects (images/<split>/..., labels/<split>/...).
+
+    Images whose label file was malformed at pack time are skipped: ultralytics
+    would treat an image without a label as a negative.
+
+    Returns: number of images written.
+    """
+    ds = PackedDataset(packed_root)
+    has_label = ds.columns["has_label"]
+    bad_label = ds.columns.get("bad_label", np.zeros(len(ds), dtype=bool))
+
+    for split in ds.split_names:
+        os.makedirs(os.path.join(out_root, "images", split), exist_ok=True)
+        os.makedirs(os.path.join(out_root, "labels", split), exist_ok=True)
+
+    written = 0
+    for i in range(len(ds)):
+        if bad_label[i]:
+            continue
+        split = ds.split_names[int(ds.split[i])]
+        fname = str(ds.file_names[i])
+
+        with open(os.path.join(out_root, "images", split, fname), "wb") as f:
+            f.write(ds.read_bytes(i))
+
+        if has_label[i]:
+            lbl_path = os.path.join(out_root, "labels", split, os.path.splitext(fname)[0] + ".txt")
+            with open(lbl_path, "w") as f:
+                f.write(format_yolo_label(*ds.labels(i)))
+        written += 1
+
+    ds.close()
+    print(f"[Unpack] {written} images -> {out_root}")
+    if written < len(ds):
+        print(f"[Unpack] Skipped {len(ds) - written} image(s) whose label was malformed when packed.")
+    return written
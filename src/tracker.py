@@ -0,0 +1,154 @@
+"""
+Per-object persistence for the Detector.
+CURRENT ROLE: Associates detections between frames by IoU and keeps hit/miss
+counts and a decayed confidence score per track, so a pause is triggered by
+one defect that persists — not by any detection anywhere in the frame.
+FUTURE ROLE: Tune confirm_hits / max_misses per camera once real flicker
+statistics from live monitoring are available.
+"""
+
+import numpy as np
+
+from src.utils import box_iou
+
+
+class Tracker:
+    """
+    Fixed-capacity IoU tracker with all state in NumPy arrays.
+
+    Each frame, live tracks and new detections are matched in one
+    (tracks x detections) IoU matrix: a pair matches when each is the
+    other's best IoU and that IoU reaches iou_threshold. Matched tracks gain
+    a hit and refresh their box; unmatched tracks gain a miss and are dropped
+    after max_misses consecutive misses; unmatched detections start new
+    tracks. Per-frame cost is O(tracks x detections) with no Python loop
+    over boxes.
+
+    A track is confirmed once it has confirm_hits hits and its decayed score
+    (exponential moving average of its confidences, decayed further on every
+    miss) is at least min_score. A single flickering frame therefore no
+    longer resets a real defect, while scattered one-off false positives
+    never accumulate hits on the same track.
+    """
+
+    def __init__(
+        self,
+        confirm_hits: int = 5,
+        max_misses: int = 2,
+        iou_threshold: float = 0.3,
+        decay: float = 0.8,
+        min_score: float = 0.4,
+        max_tracks: int = 64,
+    ):
+        """
+        Args:
+            confirm_hits: Frames a track must be matched in before it is confirmed.
+            max_misses: Consecutive missed frames a track survives.
+            iou_threshold: Minimum IoU to associate a detection with a track.
+            decay: Weight of the previous score (0–1); also the factor the
+                score is multiplied by on a missed frame.
+            min_score: Minimum decayed score for confirmation (0–1).
+            max_tracks: Capacity. Detections beyond it are not tracked.
+        """
+        self.confirm_hits = confirm_hits
+        self.max_misses = max_misses
+        self.iou_threshold = iou_threshold
+        self.decay = np.float32(decay)
+        self.min_score = min_score
+
+        self.boxes = np.zeros((max_tracks, 4), dtype=np.float32)
+        self.class_ids = np.zeros(max_tracks, dtype=np.int64)
+        self.track_ids = np.zeros(max_tracks, dtype=np.int64)
+        self.hits = np.zeros(max_tracks, dtype=np.int32)
+        self.misses = np.zeros(max_tracks, dtype=np.int32)
+        self.scores = np.zeros(max_tracks, dtype=np.float32)
+        self.active = np.zeros(max_tracks, dtype=bool)
+        self.confirmed = np.zeros(max_tracks, dtype=bool)
+        self._matched = np.zeros(max_tracks, dtype=bool)
+        self._next_id = 0
+
+    def update(self, boxes, confidences, class_ids) -> bool:
+        """
+        Advance all tracks by one frame.
+
+        Args:
+            boxes: (n, 4) [x1, y1, x2, y2] detections of this frame.
+            confidences: (n,) detection confidences.
+            class_ids: (n,) detection class ids.
+
+        Returns:
+            bool: True if any live track is confirmed.
+        """
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        confidences = np.asarray(confidences, dtype=np.float32)
+        class_ids = np.asarray(class_ids, dtype=np.int64)
+
+        live = np.flatnonzero(self.active)
+        track_idx, det_idx = self._associate(live, boxes)
+
+        # Matched tracks: refresh box/class, count the hit, blend in the confidence.
+        self.boxes[track_idx] = boxes[det_idx]
+        self.class_ids[track_idx] = class_ids[det_idx]
+        self.hits[track_idx] += 1
+        self.misses[track_idx] = 0
+        self.scores[track_idx] = self.decay * self.scores[track_idx] + (1 - self.decay) * confidences[det_idx]
+
+        # Unmatched live tracks: count the miss, decay the score, drop stale ones.
+        self._matched[:] = False
+        self._matched[track_idx] = True
+        missed = self.active & ~self._matched
+        self.misses[missed] += 1
+        self.scores[missed] *= self.decay
+        dead = self.active & (self.misses > self.max_misses)
+        self.active[dead] = False
+        self.confirmed[dead] = False
+
+        # Unmatched detections start new tracks, most confident first.
+        unmatched = np.ones(len(boxes), dtype=bool)
+        unmatched[det_idx] = False
+        new = np.flatnonzero(unmatched)
+        new = new[np.argsort(-confidences[new], kind="stable")]
+        free = np.flatnonzero(~self.active)[:len(new)]
+        new = new[:len(free)]
+
+        self.boxes[free] = boxes[new]
+        self.class_ids[free] = class_ids[new]
+        self.track_ids[free] = np.arange(self._next_id, self._next_id + len(free))
+        self._next_id += len(free)
+        self.hits[free] = 1
+        self.misses[free] = 0
+        self.scores[free] = confidences[new]
+        self.active[free] = True
+        self.confirmed[free] = False
+
+        self.confirmed |= self.active & (self.hits >= self.confirm_hits) & (self.scores >= self.min_score)
+        return bool(self.confirmed.any())
+
+    def _associate(self, live, boxes):
+        """
+        Mutual-best IoU matching between live tracks and detections.
+        Returns: (track slot indices, detection indices) of the matched pairs.
+        """
+        if len(live) == 0 or len(boxes) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+
+        iou = box_iou(self.boxes[live], boxes)
+        best_det = iou.argmax(axis=1)
+        best_track = iou.argmax(axis=0)
+        rows = np.arange(len(live))
+        mutual = (best_track[best_det] == rows) & (iou[rows, best_det] >= self.iou_threshold)
+        return live[mutual], best_det[mutual]
+
+    def reset(self):
+        """Forget all tracks (call after the printer is paused)."""
+        self.active[:] = False
+        self.confirmed[:] = False
+        self.hits[:] = 0
+        self.misses[:] = 0
+        self.scores[:] = 0
+
+    @property
+    def max_hits(self) -> int:
+        """Hits of the most persistent live track (0 if there is none)."""
+        return int(self.hits[self.active].max(initial=0))
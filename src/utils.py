@@ -0,0 +1,87 @@
+"""
+Shared helpers for the dataset tools and the monitoring runtime.
+CURRENT ROLE: Reading/writing YOLO label files and vectorized box maths,
+so every tool parses and scores boxes the same way.
+"""
+
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def read_yolo_label(path):
+    """
+    Parse a YOLO detection label file (one 'class xc yc w h' line per object).
+
+    Returns:
+        (cls, boxes)
+        - cls (numpy.ndarray): int64 class ids, shape (n,)
+        - boxes (numpy.ndarray): float32 normalized [xc, yc, w, h], shape (n, 4)
+        An empty file (a negative image) returns two empty arrays.
+
+    Raises:
+        ValueError: if a line does not have 5 numeric fields or the class id
+            is not a non-negative whole number.
+    """
+    with open(path, "r") as f:
+        return parse_yolo_label(f.read(), source=path)
+
+
+def parse_yolo_label(text, source="label"):
+    """Same as read_yolo_label(), for label contents already read into memory."""
+    rows = [line.split() for line in text.splitlines() if line.strip()]
+
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 4), dtype=np.float32)
+
+    for n, row in enumerate(rows, start=1):
+        if len(row) != 5:
+            raise ValueError(f"{source}: line {n} has {len(row)} fields, expected 5")
+
+    try:
+        values = np.array(rows, dtype=np.float64)
+    except ValueError:
+        raise ValueError(f"{source}: non-numeric field") from None
+
+    cls = values[:, 0]
+    if not np.all(cls == np.floor(cls)):
+        raise ValueError(f"{source}: non-integer class id")
+    if (cls < 0).any():
+        raise ValueError(f"{source}: negative class id")
+
+    return cls.astype(np.int64), values[:, 1:].astype(np.float32)
+
+
+def format_yolo_label(cls, boxes):
+    """Inverse of read_yolo_label(): returns the file contents as a string."""
+    return "".join(
+        f"{int(c)} {b[0]:.6f} {b[1]:.6f} {b[2]:.6f} {b[3]:.6f}\n"
+        for c, b in zip(cls, boxes)
+    )
+
+
+def xywhn_to_xyxy(boxes, width, height):
+    """Normalized [xc, yc, w, h] -> pixel [x1, y1, x2, y2] (vectorized)."""
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    scale = np.array([width, height, width, height], dtype=np.float32)
+    half = boxes[:, 2:] / 2
+    return np.concatenate([boxes[:, :2] - half, boxes[:, :2] + half], axis=1) * scale
+
+
+def box_iou(a, b):
+    """
+    Pairwise IoU between two sets of [x1, y1, x2, y2] boxes.
+
+    Returns:
+        numpy.ndarray: float32 matrix of shape (len(a), len(b)).
+    """
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+
+    area_a = (a[:, 2:] - a[:, :2]).prod(axis=1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
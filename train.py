@@ -4,18 +4,47 @@ CURRENT ROLE / Idea: Trains a base YOLOv8 model on the synthetic/web-scraped dat
 FUTURE ROLE: Will be used for 'Transfer Learning'—taking the base model and fine-tuning it on the specific images captured from your large-scale printer for maximum accuracy.
 """
 
+import argparse
+import os
+import sys
+
 from ultralytics import YOLO
 
-def train_model():
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the 3D print defect detector")
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Composite fresh synthetic training images on the fly "
+             "(data/scripts/synthetic_stream.py) instead of reading images/train."
+    )
+    parser.add_argument(
+        "--variants", action="store_true",
+        help="After training, export/benchmark deployable variants and write "
+             "a manifest (export_variants.py)."
+    )
+    return parser.parse_args()
+
+def train_model(stream=False, variants=False):
     # 1. Load the Model
     # Start from base ImageNet pre-trained weights for a clean, unbiased training run.
     # Switch to 'yolov8n.pt' for a faster Raspberry Pi-friendly variant.
     model = YOLO("yolov8s.pt")
 
+    # On-the-fly synthetic data: the trainer swaps the train split for an
+    # in-memory stream; validation still runs on the real val split.
+    trainer = None
+    if stream:
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "scripts"))
+        from synthetic_stream import SyntheticStreamTrainer
+        trainer = SyntheticStreamTrainer
+        print("Training data: on-the-fly synthetic stream")
+
     # 2. Start Training
     print("Starting Training on Large-Scale Defect Dataset...")
 
     results = model.train(
+        trainer=trainer,
+
         # DATASET
         data='configs/defect_data.yaml',
 
@@ -60,5 +89,11 @@ def train_model():
     model.export(format='onnx')
     print("Done. Check runs/detect/3d_print_monitor/yolov8s_improved_v1/")
 
+    # 5. Optional: export the size/precision matrix and pick the deploy variant
+    if variants:
+        from export_variants import run_stage
+        run_stage(str(model.trainer.best))
+
 if __name__ == '__main__':
-    train_model()
+    args = parse_args()
+    train_model(stream=args.stream, variants=args.variants)